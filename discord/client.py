@@ -47,17 +47,33 @@ import asyncio
 import aiohttp
 import websockets
 
+try:
+    from aiohttp.multidict import CIMultiDict
+except ImportError:
+    from multidict import CIMultiDict
+
 import logging, traceback
 import sys, re
 import tempfile, os, hashlib
 import itertools
 import datetime
-from random import randint as random_integer
+from collections import deque
+from operator import itemgetter
+import random
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 PY35 = sys.version_info >= (3, 5)
 log = logging.getLogger(__name__)
-request_logging_format = '{method} {response.url} has returned {response.status}'
-request_success_log = '{response.url} with {json} received {data}'
+request_logging_format = '%s %s has returned %s'
+request_success_log = '%s with %s received %s'
+channel_messages_url = endpoints.CHANNELS + '/%s/messages'
+channel_typing_url = endpoints.CHANNELS + '/%s/typing'
+invite_regex = re.compile(r'(?:https?://)?discord\.gg/(.+)')
+permission_target_types = { Member: 'member', Role: 'role' }
 
 class Client:
     """Represents a client connection that connects to Discord.
@@ -69,6 +85,7 @@ class Client:
     .. _event loop: https://docs.python.org/3/library/asyncio-eventloops.html
     .. _connector: http://aiohttp.readthedocs.org/en/stable/client_reference.html#connectors
     .. _ProxyConnector: http://aiohttp.readthedocs.org/en/stable/client_reference.html#proxyconnector
+    .. _uvloop: https://github.com/MagicStack/uvloop
 
     Parameters
     ----------
@@ -83,9 +100,22 @@ class Client:
         Indicates if :meth:`login` should cache the authentication tokens. Defaults
         to ``True``. The method in which the cache is written is done by writing to
         disk to a temporary directory.
+    batch_messages : Optional[bool]
+        Indicates if messages received within the same event loop iteration
+        should be coalesced. When enabled, :func:`discord.on_messages` is
+        dispatched with the batch and :func:`discord.on_message` is still
+        dispatched for each message, slightly later than usual. Defaults to ``False``.
+    use_uvloop : Optional[bool]
+        Indicates if the `uvloop`_ event loop policy should be installed before
+        the default event loop is retrieved. Only applies if ``loop`` is not
+        passed. Defaults to ``False``. Note that this swaps the global event loop
+        policy, so any loop retrieved before constructing the :class:`Client`
+        will not be the one used.
     connector : aiohttp.BaseConnector
         The `connector`_ to use for connection pooling. Useful for proxies, e.g.
-        with a `ProxyConnector`_.
+        with a `ProxyConnector`_. Defaults to a ``TCPConnector`` that keeps
+        idle connections alive for 75 seconds and caches DNS lookups until
+        the next websocket reconnect.
 
     Attributes
     -----------
@@ -115,9 +145,21 @@ class Client:
     def __init__(self, *, loop=None, **options):
         self.ws = None
         self.token = None
+
+        if loop is None and options.get('use_uvloop', False):
+            if uvloop is None:
+                raise ClientException('uvloop must be installed to use use_uvloop=True')
+
+            if not isinstance(asyncio.get_event_loop_policy(), uvloop.EventLoopPolicy):
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
         self.loop = asyncio.get_event_loop() if loop is None else loop
-        self._listeners = []
+        self._listeners = deque()
         self.cache_auth = options.get('cache_auth', True)
+        self._cache_filename = None
+        self._cache_dir_ready = False
+        self._batch_messages = options.get('batch_messages', False)
+        self._message_batch = []
 
         max_messages = options.get('max_messages')
         if max_messages is None or max_messages < 100:
@@ -128,12 +170,26 @@ class Client:
         # Blame Jake for this
         user_agent = 'DiscordBot (https://github.com/Rapptz/discord.py {0}) Python/{1[0]}.{1[1]} aiohttp/{2}'
 
-        self.headers = {
+        # aiohttp converts every plain dict of headers into a CIMultiDict
+        # per request, so keep ours in that form to begin with.
+        self.headers = CIMultiDict({
             'content-type': 'application/json',
             'user-agent': user_agent.format(library_version, sys.version_info, aiohttp.__version__)
-        }
+        })
+
+        # requests without a JSON body (multipart uploads, typing) shouldn't
+        # claim to be JSON, for uploads aiohttp has to pick the content-type
+        self._bodyless_headers = self.headers.copy()
+        del self._bodyless_headers['content-type']
 
         connector = options.pop('connector', None)
+        if connector is None:
+            # keep idle connections to discord around for longer so that
+            # bursts of requests don't have to redo the TLS handshake and
+            # cache the DNS lookups since we only ever talk to a few hosts.
+            # the cache is dropped whenever the websocket reconnects
+            connector = aiohttp.TCPConnector(keepalive_timeout=75, use_dns_cache=True, loop=self.loop)
+
         self.session = aiohttp.ClientSession(loop=self.loop, connector=connector)
 
         self._closed = asyncio.Event(loop=self.loop)
@@ -142,59 +198,116 @@ class Client:
 
     # internals
 
+    def _clear_dns_cache(self):
+        # the connector never expires its cached lookups on its own so
+        # flush them to pick up any address changes on discord's end
+        clear = getattr(self.session.connector, 'clear_dns_cache', None)
+        if clear is not None:
+            clear()
+
     def _get_cache_filename(self, email):
-        filename = hashlib.md5(email.encode('utf-8')).hexdigest()
-        return os.path.join(tempfile.gettempdir(), 'discord_py', filename)
+        cached = self._cache_filename
+        if cached is not None and cached[0] == email:
+            return cached[1]
+
+        # blake2b is only available on 3.6+
+        if hasattr(hashlib, 'blake2b'):
+            filename = hashlib.blake2b(email.encode('utf-8'), digest_size=16).hexdigest()
+        else:
+            filename = hashlib.md5(email.encode('utf-8')).hexdigest()
+
+        path = os.path.join(tempfile.gettempdir(), 'discord_py', filename)
+        self._cache_filename = (email, path)
+        return path
 
     @asyncio.coroutine
     def _login_via_cache(self, email, password):
+        log.info('attempting to login via cache')
+        cache_file = self._get_cache_filename(email)
         try:
-            log.info('attempting to login via cache')
-            cache_file = self._get_cache_filename(email)
-            self.email = email
-            with open(cache_file, 'r') as f:
-                log.info('login cache file found')
-                self.token = f.read()
-                self.headers['authorization'] = self.token
-
-            # at this point our check failed
-            # so we have to login and get the proper token and then
-            # redo the cache
+            with open(cache_file, 'rb') as f:
+                token = f.read()
         except OSError:
             log.info('a problem occurred while opening login cache')
-            pass # file not found et al
+            return # file not found et al
+
+        log.info('login cache file found')
+
+        # a truncated or otherwise corrupted cache is not worth sending
+        if len(token) < 16:
+            log.info('login cache file is corrupted, ignoring it')
+            return
+
+        self.email = email
+        self.token = token.decode('utf-8')
+        self._set_authorization(self.token)
 
     def _update_cache(self, email, password):
         try:
             cache_file = self._get_cache_filename(email)
-            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
-            with os.fdopen(os.open(cache_file, os.O_WRONLY | os.O_CREAT, 0o0600), 'w') as f:
+            if not self._cache_dir_ready:
+                os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                self._cache_dir_ready = True
+
+            # write to a temporary file first and rename it over the
+            # old cache so that readers never see a partial token
+            tmp_file = cache_file + '.tmp'
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o0600)
+            try:
                 log.info('updating login cache')
-                f.write(self.token)
+                os.write(fd, self.token.encode('utf-8'))
+            finally:
+                os.close(fd)
+
+            os.replace(tmp_file, cache_file)
         except OSError:
             log.info('a problem occurred while updating the login cache')
             pass
 
+    def _set_authorization(self, value):
+        self.headers['authorization'] = value
+        self._bodyless_headers['authorization'] = value
+
     def handle_message(self, message):
-        removed = []
-        for i, (condition, future) in enumerate(self._listeners):
+        self._handle_message_batch((message,))
+
+    def _handle_message_batch(self, messages):
+        # rebuild the listeners in a single pass rather than
+        # deleting the finished ones by index afterwards
+        survivors = deque()
+        for condition, future in self._listeners:
             if future.cancelled():
-                removed.append(i)
                 continue
 
-            try:
-                result = condition(message)
-            except Exception as e:
-                future.set_exception(e)
-                removed.append(i)
-            else:
+            # a listener is resolved by the first message that passes
+            for message in messages:
+                try:
+                    result = condition(message)
+                except Exception as e:
+                    future.set_exception(e)
+                    break
+
                 if result:
                     future.set_result(message)
-                    removed.append(i)
+                    break
+            else:
+                survivors.append((condition, future))
+
+        self._listeners = survivors
 
+    def _flush_message_batch(self):
+        batch = self._message_batch
+        self._message_batch = []
+        self._handle_message_batch(batch)
 
-        for idx in reversed(removed):
-            del self._listeners[idx]
+        coro = getattr(self, 'on_message', None)
+        if coro is not None:
+            for message in batch:
+                self.loop.create_task(self._run_event(coro, 'on_message', message))
+
+        coro = getattr(self, 'on_messages', None)
+        if coro is not None:
+            self.loop.create_task(self._run_event(coro, 'on_messages', batch))
 
     def handle_ready(self):
         self._is_ready.set()
@@ -203,14 +316,18 @@ class Client:
         if isinstance(invite, Invite) or isinstance(invite, Object):
             return invite.id
         else:
-            rx = r'(?:https?\:\/\/)?discord\.gg\/(.+)'
-            m = re.match(rx, invite)
+            m = invite_regex.match(invite)
             if m:
                 return m.group(1)
         return invite
 
     @asyncio.coroutine
     def _resolve_destination(self, destination):
+        # fast path for the overwhelmingly common case of an exact channel
+        cls = type(destination)
+        if cls is Channel or cls is PrivateChannel:
+            return destination.id
+
         if isinstance(destination, (Channel, PrivateChannel, Server)):
             return destination.id
         elif isinstance(destination, User):
@@ -226,23 +343,40 @@ class Client:
         else:
             raise InvalidArgument('Destination must be Channel, PrivateChannel, User, or Object')
 
-    def __getattr__(self, name):
-        if name in ('user', 'servers', 'private_channels', 'messages', 'voice_clients'):
-            return getattr(self.connection, name)
-        else:
-            msg = "'{}' object has no attribute '{}'"
-            raise AttributeError(msg.format(self.__class__, name))
+    # these are forwarded to the connection state, which owns the cache
 
-    def __setattr__(self, name, value):
-        if name in ('user', 'servers', 'private_channels', 'messages', 'voice_clients'):
-            return setattr(self.connection, name, value)
-        else:
-            object.__setattr__(self, name, value)
+    @property
+    def user(self):
+        return self.connection.user
+
+    @user.setter
+    def user(self, value):
+        self.connection.user = value
+
+    @property
+    def servers(self):
+        return self.connection.servers
+
+    @property
+    def private_channels(self):
+        return self.connection.private_channels
+
+    @property
+    def messages(self):
+        return self.connection.messages
+
+    @messages.setter
+    def messages(self, value):
+        self.connection.messages = value
+
+    @property
+    def voice_clients(self):
+        return self.connection.voice_clients
 
     @asyncio.coroutine
-    def _run_event(self, event, *args, **kwargs):
+    def _run_event(self, coro, event, *args, **kwargs):
         try:
-            yield from getattr(self, event)(*args, **kwargs)
+            yield from coro(*args, **kwargs)
         except asyncio.CancelledError:
             pass
         except Exception:
@@ -251,16 +385,32 @@ class Client:
             except asyncio.CancelledError:
                 pass
 
+    def _has_handler(self, event):
+        # the gateway uses this to skip building events nobody listens to.
+        # a subclass overriding dispatch could be intercepting any event
+        if type(self).dispatch is not Client.dispatch:
+            return True
+        return hasattr(self, 'on_' + event)
+
     def dispatch(self, event, *args, **kwargs):
-        log.debug('Dispatching event {}'.format(event))
+        log.debug('Dispatching event %s', event)
+        if event == 'message' and self._batch_messages:
+            # coalesce the messages received in this loop iteration
+            # and handle them together in _flush_message_batch
+            self._message_batch.append(args[0])
+            if len(self._message_batch) == 1:
+                self.loop.call_soon(self._flush_message_batch)
+            return
+
         method = 'on_' + event
-        handler = 'handle_' + event
+        handler = getattr(self, 'handle_' + event, None)
 
-        if hasattr(self, handler):
-            getattr(self, handler)(*args, **kwargs)
+        if handler is not None:
+            handler(*args, **kwargs)
 
-        if hasattr(self, method):
-            compat.create_task(self._run_event(method, *args, **kwargs), loop=self.loop)
+        coro = getattr(self, method, None)
+        if coro is not None:
+            self.loop.create_task(self._run_event(coro, method, *args, **kwargs))
 
     @asyncio.coroutine
     def on_error(self, event_method, *args, **kwargs):
@@ -282,10 +432,10 @@ class Client:
         log.info('logging in using static token')
         self.token = token
         self.email = None
-        self.headers['authorization'] = 'Bot {}'.format(self.token)
+        self._set_authorization('Bot {}'.format(self.token))
         resp = yield from self.session.get(endpoints.ME, headers=self.headers)
         yield from resp.release()
-        log.debug(request_logging_format.format(method='GET', response=resp))
+        log.debug(request_logging_format, 'GET', resp.url, resp.status)
 
         if resp.status != 200:
             if resp.status == 401:
@@ -293,7 +443,7 @@ class Client:
             else:
                 raise HTTPException(resp, None)
 
-        log.info('token auth returned status code {}'.format(resp.status))
+        log.info('token auth returned status code %s', resp.status)
         self._is_logged_in.set()
 
     @asyncio.coroutine
@@ -309,9 +459,9 @@ class Client:
             'password': password
         }
 
-        data = utils.to_json(payload)
+        data = utils._to_json_body(payload)
         resp = yield from self.session.post(endpoints.LOGIN, data=data, headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=resp))
+        log.debug(request_logging_format, 'POST', resp.url, resp.status)
         if resp.status != 200:
             yield from resp.release()
             if resp.status == 400:
@@ -319,12 +469,12 @@ class Client:
             else:
                 raise HTTPException(resp, None)
 
-        log.info('logging in returned status code {}'.format(resp.status))
+        log.info('logging in returned status code %s', resp.status)
         self.email = email
 
-        body = yield from resp.json(encoding='utf-8')
+        body = yield from resp.json(loads=utils.from_json)
         self.token = body['token']
-        self.headers['authorization'] = self.token
+        self._set_authorization(self.token)
         self._is_logged_in.set()
 
         # since we went through all this trouble
@@ -379,7 +529,7 @@ class Client:
         yield from response.release()
         yield from self.close()
         self._is_logged_in.clear()
-        log.debug(request_logging_format.format(method='POST', response=response))
+        log.debug(request_logging_format, 'POST', response.url, response.status)
 
     @asyncio.coroutine
     def connect(self):
@@ -403,6 +553,7 @@ class Client:
                 yield from self.ws.poll_event()
             except ReconnectWebSocket:
                 log.info('Reconnecting the websocket.')
+                self._clear_dns_cache()
                 self.ws = yield from DiscordWebSocket.from_client(self)
             except ConnectionClosed as e:
                 yield from self.close()
@@ -418,7 +569,7 @@ class Client:
         if self.is_closed:
             return
 
-        for voice in list(self.voice_clients):
+        for voice in tuple(self.connection.voice_clients):
             try:
                 yield from voice.disconnect()
             except:
@@ -510,7 +661,7 @@ class Client:
         return self.connection._get_server(id)
 
     def get_all_channels(self):
-        """A generator that retrieves every :class:`Channel` the client can 'access'.
+        """Returns an iterator that retrieves every :class:`Channel` the client can 'access'.
 
         This is equivalent to: ::
 
@@ -525,12 +676,10 @@ class Client:
         be used for that.
         """
 
-        for server in self.servers:
-            for channel in server.channels:
-                yield channel
+        return itertools.chain.from_iterable(server.channels for server in self.connection.servers)
 
     def get_all_members(self):
-        """Returns a generator with every :class:`Member` the client can see.
+        """Returns an iterator with every :class:`Member` the client can see.
 
         This is equivalent to: ::
 
@@ -539,9 +688,7 @@ class Client:
                     yield member
 
         """
-        for server in self.servers:
-            for member in server.members:
-                yield member
+        return itertools.chain.from_iterable(server.members for server in self.connection.servers)
 
     # listeners/waiters
 
@@ -656,24 +803,26 @@ class Client:
             The message that you requested for.
         """
 
+        channel_id = getattr(channel, 'id', None)
+        has_check = callable(check)
+
         def predicate(message):
-            result = True
-            if author is not None:
-                result = result and message.author == author
+            if author is not None and message.author != author:
+                return False
 
-            if content is not None:
-                result = result and message.content == content
+            if content is not None and message.content != content:
+                return False
 
-            if channel is not None:
-                result = result and message.channel.id == channel.id
+            if channel is not None and message.channel.id != channel_id:
+                return False
 
-            if callable(check):
+            if has_check:
                 # the exception thrown by check is propagated through the future.
-                result = result and check(message)
+                return check(message)
 
-            return result
+            return True
 
-        future = asyncio.Future(loop=self.loop)
+        future = compat.create_future(self.loop)
         self._listeners.append((predicate, future))
         try:
             message = yield from asyncio.wait_for(future, timeout, loop=self.loop)
@@ -712,7 +861,7 @@ class Client:
             raise ClientException('event registered must be a coroutine function')
 
         setattr(self, coro.__name__, coro)
-        log.info('{0.__name__} has successfully been registered as an event'.format(coro))
+        log.info('%s has successfully been registered as an event', coro.__name__)
         return coro
 
     def async_event(self, coro):
@@ -756,36 +905,50 @@ class Client:
             'recipient_id': user.id
         }
 
-        url = '{}/channels'.format(endpoints.ME)
-        r = yield from self.session.post(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=r))
+        # the payload has a fixed shape and snowflakes are digit-only strings,
+        # so it can be spliced together directly instead of going through to_json
+        data = b'{"recipient_id":"' + user.id.encode('ascii') + b'"}'
+        url = endpoints.ME + '/channels'
+        r = yield from self.session.post(url, data=data, headers=self.headers)
+        log.debug(request_logging_format, 'POST', r.url, r.status)
         yield from utils._verify_successful_response(r)
-        data = yield from r.json(encoding='utf-8')
-        log.debug(request_success_log.format(response=r, json=payload, data=data))
+        data = yield from r.json(loads=utils.from_json)
+        log.debug(request_success_log, r.url, payload, data)
         channel = PrivateChannel(id=data['id'], user=user)
         self.connection._add_private_channel(channel)
         return channel
 
+    @asyncio.coroutine
+    def _image_to_base64_data(self, data):
+        # encoding a large image takes long enough to hold up the
+        # heartbeat so it is done in the default executor instead
+        if len(data) < 262144:
+            return utils._bytes_to_base64_data(data)
+        return (yield from self.loop.run_in_executor(None, utils._bytes_to_base64_data, data))
+
     @asyncio.coroutine
     def _retry_helper(self, name, *args, retries=0, **kwargs):
         req_kwargs = {'headers': self.headers}
         req_kwargs.update(kwargs)
         resp = yield from self.session.request(*args, **req_kwargs)
-        tmp = request_logging_format.format(method=resp.method, response=resp)
-        log_fmt = 'In {}, {}'.format(name, tmp)
-        log.debug(log_fmt)
+        log.debug('In %s, ' + request_logging_format, name, resp.method, resp.url, resp.status)
 
         if resp.status == 502 and retries < 5:
             # retry the 502 request unconditionally
             log.info('Retrying the 502 request to ' + name)
-            yield from asyncio.sleep(retries + 1)
+            yield from resp.release()
+            # exponential backoff with jitter so that clients don't retry in lockstep
+            backoff = min(30, 2 ** retries) + random.random()
+            yield from asyncio.sleep(backoff)
             return (yield from self._retry_helper(name, *args, retries=retries + 1, **kwargs))
 
-        if resp.status == 429:
+        if resp.status == 429 and retries < 5:
+            # retrying before Retry-After is up only earns another 429 so
+            # the full wait is honoured. once out of retries the 429 is returned
             retry = float(resp.headers['Retry-After']) / 1000.0
             yield from resp.release()
             yield from asyncio.sleep(retry)
-            return (yield from self._retry_helper(name, *args, retries=retries, **kwargs))
+            return (yield from self._retry_helper(name, *args, retries=retries + 1, **kwargs))
 
         return resp
 
@@ -838,23 +1001,23 @@ class Client:
 
         channel_id = yield from self._resolve_destination(destination)
 
-        content = str(content)
+        if not isinstance(content, str):
+            content = str(content)
 
-        url = '{base}/{id}/messages'.format(base=endpoints.CHANNELS, id=channel_id)
-        payload = {
-            'content': content,
-            'nonce': random_integer(-2**63, 2**63 - 1)
-        }
+        url = channel_messages_url % channel_id
 
-        if tts:
-            payload['tts'] = True
+        # the payload always has the same shape so only the content
+        # has to go through the JSON encoder
+        payload = '{"content":%s,"nonce":%d%s}' % (utils.to_json(content),
+                                                  int.from_bytes(os.urandom(8), 'little', signed=True),
+                                                  ',"tts":true' if tts else '')
 
-        resp = yield from self._retry_helper('send_message', 'POST', url, data=utils.to_json(payload))
+        resp = yield from self._retry_helper('send_message', 'POST', url, data=payload)
         yield from utils._verify_successful_response(resp)
-        data = yield from resp.json(encoding='utf-8')
-        log.debug(request_success_log.format(response=resp, json=payload, data=data))
+        data = yield from resp.json(loads=utils.from_json)
+        log.debug(request_success_log, resp.url, payload, data)
         channel = self.get_channel(data.get('channel_id'))
-        message = Message(channel=channel, **data)
+        message = Message(channel, data)
         return message
 
     @asyncio.coroutine
@@ -875,10 +1038,10 @@ class Client:
 
         channel_id = yield from self._resolve_destination(destination)
 
-        url = '{base}/{id}/typing'.format(base=endpoints.CHANNELS, id=channel_id)
+        url = channel_typing_url % channel_id
 
-        response = yield from self.session.post(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=response))
+        response = yield from self.session.post(url, headers=self._bodyless_headers)
+        log.debug(request_logging_format, 'POST', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -931,7 +1094,7 @@ class Client:
 
         channel_id = yield from self._resolve_destination(destination)
 
-        url = '{base}/{id}/messages'.format(base=endpoints.CHANNELS, id=channel_id)
+        url = channel_messages_url % channel_id
         form = aiohttp.FormData()
 
         if content is not None:
@@ -940,25 +1103,31 @@ class Client:
         form.add_field('tts', 'true' if tts else 'false')
 
         # we don't want the content-type json in this request
-        headers = self.headers.copy()
-        headers.pop('content-type', None)
+        headers = self._bodyless_headers
 
         try:
-            # attempt to open the file and send the request
-            with open(fp, 'rb') as f:
-                form.add_field('file', f, filename=filename, content_type='application/octet-stream')
-                response = yield from self._retry_helper("send_file", "POST", url, data=form, headers=headers)
+            f = open(fp, 'rb')
         except TypeError:
-            form.add_field('file', fp, filename=filename, content_type='application/octet-stream')
+            # a file-like object was passed, we don't own it
+            f = None
+        else:
+            fp = f
+
+        # aiohttp reads file objects in chunks while writing the body,
+        # so the file only has to stay open until the request is done
+        form.add_field('file', fp, filename=filename, content_type='application/octet-stream')
+        try:
             response = yield from self._retry_helper("send_file", "POST", url, data=form, headers=headers)
+        finally:
+            if f is not None:
+                f.close()
 
-        log.debug(request_logging_format.format(method='POST', response=response))
+        log.debug(request_logging_format, 'POST', response.url, response.status)
         yield from utils._verify_successful_response(response)
-        data = yield from response.json(encoding='utf-8')
-        msg = 'POST {0.url} returned {0.status} with {1} response'
-        log.debug(msg.format(response, data))
+        data = yield from response.json(loads=utils.from_json)
+        log.debug('POST %s returned %s with %s response', response.url, response.status, data)
         channel = self.get_channel(data.get('channel_id'))
-        message = Message(channel=channel, **data)
+        message = Message(channel, data)
         return message
 
     @asyncio.coroutine
@@ -983,9 +1152,9 @@ class Client:
             Deleting the message failed.
         """
 
-        url = '{}/{}/messages/{}'.format(endpoints.CHANNELS, message.channel.id, message.id)
+        url = '%s/%s/messages/%s' % (endpoints.CHANNELS, message.channel.id, message.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1019,18 +1188,19 @@ class Client:
             Deleting the messages failed.
         """
 
-        messages = list(messages)
+        if not isinstance(messages, list):
+            messages = list(messages)
+
         if len(messages) > 100 or len(messages) < 2:
             raise ClientException('Can only delete messages in the range of [2, 100]')
 
         channel_id = messages[0].channel.id
-        url = '{0}/{1}/messages/bulk_delete'.format(endpoints.CHANNELS, channel_id)
-        payload = {
-            'messages': [m.id for m in messages]
-        }
+        url = '%s/%s/messages/bulk_delete' % (endpoints.CHANNELS, channel_id)
+        # message IDs are digit-only strings so they need no escaping
+        payload = '{"messages":["' + '","'.join(m.id for m in messages) + '"]}'
 
-        response = yield from self.session.post(url, headers=self.headers, data=utils.to_json(payload))
-        log.debug(request_logging_format.format(method='POST', response=response))
+        response = yield from self.session.post(url, headers=self.headers, data=payload)
+        log.debug(request_logging_format, 'POST', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1095,31 +1265,53 @@ class Client:
         ret = []
         count = 0
 
-        while True:
-            try:
-                msg = yield from iterator.iterate()
-            except asyncio.QueueEmpty:
-                # no more messages to poll
-                if count >= 2:
-                    # more than 2 messages -> bulk delete
-                    to_delete = ret[-count:]
-                    yield from self.delete_messages(to_delete)
-                elif count == 1:
-                    # delete a single message
-                    yield from self.delete_message(ret[-1])
-
-                return ret
-            else:
-                if count == 100:
-                    # we've reached a full 'queue'
-                    to_delete = ret[-100:]
-                    yield from self.delete_messages(to_delete)
-                    count = 0
-                    yield from asyncio.sleep(1)
+        # the bulk delete of a full batch runs in the background while the
+        # next batch is being fetched. Only one is in flight at a time.
+        pending = None
 
-                if check(msg):
-                    count += 1
-                    ret.append(msg)
+        try:
+            while True:
+                try:
+                    msg = yield from iterator.iterate()
+                except asyncio.QueueEmpty:
+                    # no more messages to poll
+                    if pending is not None:
+                        yield from pending
+                        pending = None
+
+                    if count >= 2:
+                        # more than 2 messages -> bulk delete
+                        to_delete = ret[-count:]
+                        yield from self.delete_messages(to_delete)
+                    elif count == 1:
+                        # delete a single message
+                        yield from self.delete_message(ret[-1])
+
+                    return ret
+                else:
+                    if count == 100:
+                        # we've reached a full 'queue'
+                        if pending is not None:
+                            yield from pending
+                            pending = None
+
+                        to_delete = ret[-100:]
+                        pending = self.loop.create_task(self.delete_messages(to_delete))
+                        count = 0
+                        yield from asyncio.sleep(1)
+
+                    if check(msg):
+                        count += 1
+                        ret.append(msg)
+        finally:
+            # something else failed or we were cancelled while a bulk
+            # delete was in flight, don't leave it running unobserved
+            iterator._cancel_prefetch()
+            if pending is not None:
+                if not pending.done():
+                    pending.cancel()
+                elif not pending.cancelled():
+                    pending.exception()
 
     @asyncio.coroutine
     def edit_message(self, message, new_content):
@@ -1150,17 +1342,17 @@ class Client:
         channel = message.channel
         content = str(new_content)
 
-        url = '{}/{}/messages/{}'.format(endpoints.CHANNELS, channel.id, message.id)
+        url = '%s/%s/messages/%s' % (endpoints.CHANNELS, channel.id, message.id)
         payload = {
             'content': content
         }
 
-        response = yield from self._retry_helper('edit_message', 'PATCH', url, data=utils.to_json(payload))
-        log.debug(request_logging_format.format(method='PATCH', response=response))
+        response = yield from self._retry_helper('edit_message', 'PATCH', url, data=utils._to_json_body(payload))
+        log.debug(request_logging_format, 'PATCH', response.url, response.status)
         yield from utils._verify_successful_response(response)
-        data = yield from response.json(encoding='utf-8')
-        log.debug(request_success_log.format(response=response, json=payload, data=data))
-        return Message(channel=channel, **data)
+        data = yield from response.json(loads=utils.from_json)
+        log.debug(request_success_log, response.url, payload, data)
+        return Message(channel, data)
 
     @asyncio.coroutine
     def _logs_from(self, channel, limit=100, before=None, after=None):
@@ -1213,7 +1405,7 @@ class Client:
                 if message.author == client.user:
                     counter += 1
         """
-        url = '{}/{}/messages'.format(endpoints.CHANNELS, channel.id)
+        url = channel_messages_url % channel.id
         params = {
             'limit': limit
         }
@@ -1224,9 +1416,9 @@ class Client:
             params['after'] = after.id
 
         response = yield from self.session.get(url, params=params, headers=self.headers)
-        log.debug(request_logging_format.format(method='GET', response=response))
+        log.debug(request_logging_format, 'GET', response.url, response.status)
         yield from utils._verify_successful_response(response)
-        messages = yield from response.json(encoding='utf-8')
+        messages = yield from response.json(loads=utils.from_json)
         return messages
 
     if PY35:
@@ -1246,10 +1438,14 @@ class Client:
                 after = Object(utils.time_snowflake(after, high=True))
 
             def generator(data):
-                for message in data:
-                    yield Message(channel=channel, **message)
-
-            result = []
+                # consume the raw data as we go so that the payloads
+                # can be freed once their Message has been built
+                while data:
+                    yield Message(channel, data.popleft())
+
+            # the pages have to be fetched up front as the generator
+            # returned cannot be asynchronous in Python 3.4
+            result = deque()
             while limit > 0:
                 retrieve = limit if limit <= 100 else 100
                 data = yield from self._logs_from(channel, retrieve, before, after)
@@ -1328,9 +1524,9 @@ class Client:
             Kicking failed.
         """
 
-        url = '{0}/{1.server.id}/members/{1.id}'.format(endpoints.SERVERS, member)
+        url = '%s/%s/members/%s' % (endpoints.SERVERS, member.server.id, member.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1366,9 +1562,9 @@ class Client:
             'delete-message-days': delete_message_days
         }
 
-        url = '{0}/{1.server.id}/bans/{1.id}'.format(endpoints.SERVERS, member)
+        url = '%s/%s/bans/%s' % (endpoints.SERVERS, member.server.id, member.id)
         response = yield from self.session.put(url, params=params, headers=self.headers)
-        log.debug(request_logging_format.format(method='PUT', response=response))
+        log.debug(request_logging_format, 'PUT', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1393,9 +1589,9 @@ class Client:
             Unbanning failed.
         """
 
-        url = '{0}/{1.id}/bans/{2.id}'.format(endpoints.SERVERS, server, user)
+        url = '%s/%s/bans/%s' % (endpoints.SERVERS, server.id, user.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1428,14 +1624,14 @@ class Client:
             The operation failed.
         """
 
-        url = '{0}/{1.server.id}/members/{1.id}'.format(endpoints.SERVERS, member)
+        url = '%s/%s/members/%s' % (endpoints.SERVERS, member.server.id, member.id)
         payload = {
             'mute': mute,
             'deaf': deafen
         }
 
-        response = yield from self.session.patch(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=response))
+        response = yield from self.session.patch(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'PATCH', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1490,7 +1686,7 @@ class Client:
             avatar = self.user.avatar
         else:
             if avatar_bytes is not None:
-                avatar = utils._bytes_to_base64_data(avatar_bytes)
+                avatar = yield from self._image_to_base64_data(avatar_bytes)
             else:
                 avatar = None
 
@@ -1511,17 +1707,17 @@ class Client:
                 payload['new_password'] = fields['new_password']
 
 
-        r = yield from self.session.patch(endpoints.ME, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=r))
+        r = yield from self.session.patch(endpoints.ME, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'PATCH', r.url, r.status)
         yield from utils._verify_successful_response(r)
 
-        data = yield from r.json(encoding='utf-8')
-        log.debug(request_success_log.format(response=r, json=payload, data=data))
+        data = yield from r.json(loads=utils.from_json)
+        log.debug(request_success_log, r.url, payload, data)
 
         if not_bot_account:
             self.token = data['token']
             self.email = data['email']
-            self.headers['authorization'] = self.token
+            self._set_authorization(self.token)
 
             if self.cache_auth:
                 self._update_cache(self.email, password)
@@ -1580,11 +1776,9 @@ class Client:
         """
 
         if member == self.user:
-            fmt = '{0}/{1.server.id}/members/@me/nick'
+            url = '%s/%s/members/@me/nick' % (endpoints.SERVERS, member.server.id)
         else:
-            fmt = '{0}/{1.server.id}/members/{1.id}'
-
-        url = fmt.format(endpoints.SERVERS, member)
+            url = '%s/%s/members/%s' % (endpoints.SERVERS, member.server.id, member.id)
 
         payload = {
             # oddly enough, this endpoint requires '' to clear the nickname
@@ -1593,8 +1787,8 @@ class Client:
             'nick': nickname if nickname else ''
         }
 
-        r = yield from self.session.patch(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=r))
+        r = yield from self.session.patch(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'PATCH', r.url, r.status)
         yield from utils._verify_successful_response(r)
         yield from r.release()
 
@@ -1633,7 +1827,7 @@ class Client:
             Editing the channel failed.
         """
 
-        url = '{0}/{1.id}'.format(endpoints.CHANNELS, channel)
+        url = '%s/%s' % (endpoints.CHANNELS, channel.id)
         payload = {
             'name': options.get('name', channel.name),
             'topic': options.get('topic', channel.topic),
@@ -1648,12 +1842,12 @@ class Client:
         if bitrate is not None:
             payload['bitrate'] = bitrate
 
-        r = yield from self.session.patch(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=r))
+        r = yield from self.session.patch(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'PATCH', r.url, r.status)
         yield from utils._verify_successful_response(r)
 
-        data = yield from r.json(encoding='utf-8')
-        log.debug(request_success_log.format(response=r, json=payload, data=data))
+        data = yield from r.json(loads=utils.from_json)
+        log.debug(request_success_log, r.url, payload, data)
 
     @asyncio.coroutine
     def create_channel(self, server, name, type=None):
@@ -1693,16 +1887,16 @@ class Client:
 
         payload = {
             'name': name,
-            'type': str(type)
+            'type': getattr(type, 'value', type)
         }
 
-        url = '{0}/{1.id}/channels'.format(endpoints.SERVERS, server)
-        response = yield from self.session.post(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=response))
+        url = '%s/%s/channels' % (endpoints.SERVERS, server.id)
+        response = yield from self.session.post(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'POST', response.url, response.status)
         yield from utils._verify_successful_response(response)
 
-        data = yield from response.json(encoding='utf-8')
-        log.debug(request_success_log.format(response=response, data=data, json=payload))
+        data = yield from response.json(loads=utils.from_json)
+        log.debug(request_success_log, response.url, payload, data)
         channel = Channel(server=server, **data)
         return channel
 
@@ -1730,9 +1924,9 @@ class Client:
             Deleting the channel failed.
         """
 
-        url = '{}/{}'.format(endpoints.CHANNELS, channel.id)
+        url = '%s/%s' % (endpoints.CHANNELS, channel.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1760,9 +1954,9 @@ class Client:
             If leaving the server failed.
         """
 
-        url = '{}/@me/guilds/{.id}'.format(endpoints.USERS, server)
+        url = '%s/@me/guilds/%s' % (endpoints.USERS, server.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1786,9 +1980,9 @@ class Client:
             You do not have permissions to delete the server.
         """
 
-        url = '{0}/{1.id}'.format(endpoints.SERVERS, server)
+        url = '%s/%s' % (endpoints.SERVERS, server.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -1823,7 +2017,7 @@ class Client:
             added to cache.
         """
         if icon is not None:
-            icon = utils._bytes_to_base64_data(icon)
+            icon = yield from self._image_to_base64_data(icon)
 
         if region is None:
             region = ServerRegion.us_west.name
@@ -1836,12 +2030,12 @@ class Client:
             'region': region
         }
 
-        r = yield from self.session.post(endpoints.SERVERS, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=r))
+        r = yield from self.session.post(endpoints.SERVERS, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'POST', r.url, r.status)
         yield from utils._verify_successful_response(r)
-        data = yield from r.json(encoding='utf-8')
-        log.debug(request_success_log.format(response=r, json=payload, data=data))
-        return Server(**data)
+        data = yield from r.json(loads=utils.from_json)
+        log.debug(request_success_log, r.url, payload, data)
+        return Server(state=self.connection, **data)
 
     @asyncio.coroutine
     def edit_server(self, server, **fields):
@@ -1851,7 +2045,8 @@ class Client:
 
         You must have the proper permissions to edit the server.
 
-        The server is **not** edited in-place.
+        The server is **not** edited in-place. If none of the fields given
+        differ from the server's current state then no request is made.
 
         Parameters
         ----------
@@ -1892,7 +2087,7 @@ class Client:
             icon = server.icon
         else:
             if icon_bytes is not None:
-                icon = utils._bytes_to_base64_data(icon_bytes)
+                icon = yield from self._image_to_base64_data(icon_bytes)
             else:
                 icon = None
 
@@ -1915,9 +2110,17 @@ class Client:
 
             payload['owner_id'] = fields['owner'].id
 
-        url = '{0}/{1.id}'.format(endpoints.SERVERS, server)
-        r = yield from self.session.patch(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=r))
+        # nothing would change so don't bother with the request
+        if ('icon' not in fields and 'owner_id' not in payload and
+            payload['name'] == server.name and
+            payload['region'] == str(server.region) and
+            payload['afk_timeout'] == server.afk_timeout and
+            payload['afk_channel'] == getattr(server.afk_channel, 'id', None)):
+            return
+
+        url = '%s/%s' % (endpoints.SERVERS, server.id)
+        r = yield from self.session.patch(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'PATCH', r.url, r.status)
         yield from utils._verify_successful_response(r)
         yield from r.release()
 
@@ -1948,11 +2151,11 @@ class Client:
             A list of :class:`User` that have been banned.
         """
 
-        url = '{0}/{1.id}/bans'.format(endpoints.SERVERS, server)
+        url = '%s/%s/bans' % (endpoints.SERVERS, server.id)
         resp = yield from self.session.get(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='GET', response=resp))
+        log.debug(request_logging_format, 'GET', resp.url, resp.status)
         yield from utils._verify_successful_response(resp)
-        data = yield from resp.json(encoding='utf-8')
+        data = yield from resp.json(loads=utils.from_json)
         return [User(**user['user']) for user in data]
 
     # Invite management
@@ -1963,10 +2166,10 @@ class Client:
             ch_id = data['channel']['id']
             channel = server.get_channel(ch_id)
         else:
-            server = Object(id=data['guild']['id'])
-            server.name = data['guild']['name']
-            channel = Object(id=data['channel']['id'])
-            channel.name = data['channel']['name']
+            guild = data['guild']
+            server = Object(id=guild['id'], name=guild['name'])
+            channel = data['channel']
+            channel = Object(id=channel['id'], name=channel['name'])
         data['server'] = server
         data['channel'] = channel
 
@@ -2011,13 +2214,13 @@ class Client:
             'xkcdpass': options.get('xkcd', False)
         }
 
-        url = '{0}/{1.id}/invites'.format(endpoints.CHANNELS, destination)
-        response = yield from self.session.post(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=response))
+        url = '%s/%s/invites' % (endpoints.CHANNELS, destination.id)
+        response = yield from self.session.post(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'POST', response.url, response.status)
 
         yield from utils._verify_successful_response(response)
-        data = yield from response.json(encoding='utf-8')
-        log.debug(request_success_log.format(json=payload, response=response, data=data))
+        data = yield from response.json(loads=utils.from_json)
+        log.debug(request_success_log, response.url, payload, data)
         self._fill_invite_data(data)
         return Invite(**data)
 
@@ -2052,11 +2255,11 @@ class Client:
         """
 
         destination = self._resolve_invite(url)
-        rurl = '{0}/invite/{1}'.format(endpoints.API_BASE, destination)
+        rurl = '%s/invite/%s' % (endpoints.API_BASE, destination)
         response = yield from self.session.get(rurl, headers=self.headers)
-        log.debug(request_logging_format.format(method='GET', response=response))
+        log.debug(request_logging_format, 'GET', response.url, response.status)
         yield from utils._verify_successful_response(response)
-        data = yield from response.json(encoding='utf-8')
+        data = yield from response.json(loads=utils.from_json)
         self._fill_invite_data(data)
         return Invite(**data)
 
@@ -2086,19 +2289,18 @@ class Client:
             The list of invites that are currently active.
         """
 
-        url = '{0}/{1.id}/invites'.format(endpoints.SERVERS, server)
+        url = '%s/%s/invites' % (endpoints.SERVERS, server.id)
         resp = yield from self.session.get(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='GET', response=resp))
+        log.debug(request_logging_format, 'GET', resp.url, resp.status)
         yield from utils._verify_successful_response(resp)
-        data = yield from resp.json(encoding='utf-8')
-        result = []
+        data = yield from resp.json(loads=utils.from_json)
+        # data was just decoded so it is safe to fill in place
+        get_channel = server.get_channel
         for invite in data:
-            channel = server.get_channel(invite['channel']['id'])
-            invite['channel'] = channel
+            invite['channel'] = get_channel(invite['channel']['id'])
             invite['server'] = server
-            result.append(Invite(**invite))
 
-        return result
+        return [Invite(**invite) for invite in data]
 
     @asyncio.coroutine
     def accept_invite(self, invite):
@@ -2123,9 +2325,9 @@ class Client:
         """
 
         destination = self._resolve_invite(invite)
-        url = '{0}/invite/{1}'.format(endpoints.API_BASE, destination)
+        url = '%s/invite/%s' % (endpoints.API_BASE, destination)
         response = yield from self.session.post(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=response))
+        log.debug(request_logging_format, 'POST', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -2154,9 +2356,9 @@ class Client:
         """
 
         destination = self._resolve_invite(invite)
-        url = '{0}/invite/{1}'.format(endpoints.API_BASE, destination)
+        url = '%s/invite/%s' % (endpoints.API_BASE, destination)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -2198,25 +2400,32 @@ class Client:
         if role.position == position:
             return  # Save discord the extra request.
 
-        url = '{0}/{1.id}/roles'.format(endpoints.SERVERS, server)
+        url = '%s/%s/roles' % (endpoints.SERVERS, server.id)
 
-        change_range = range(min(role.position, position), max(role.position, position) + 1)
+        lo = min(role.position, position)
+        hi = max(role.position, position)
+        change_range = range(lo, hi + 1)
 
-        roles = [r.id for r in sorted(filter(lambda x: (x.position in change_range) and x != role, server.roles), key=lambda x: x.position)]
+        role_id = role.id
+        affected = [(r.position, r.id) for r in server.roles if lo <= r.position <= hi and r.id != role_id]
+        affected.sort(key=itemgetter(0))
+        roles = [rid for _, rid in affected]
 
         if role.position > position:
             roles.insert(0, role.id)
         else:
             roles.append(role.id)
 
-        payload = [{"id": z[0], "position": z[1]} for z in zip(roles, change_range)]
+        # role IDs are plain digit strings so the array can be spliced
+        # together directly instead of allocating a dict per role
+        payload = '[%s]' % ','.join('{"id":"%s","position":%d}' % pair for pair in zip(roles, change_range))
 
-        r = yield from self.session.patch(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=r))
+        r = yield from self.session.patch(url, data=payload, headers=self.headers)
+        log.debug(request_logging_format, 'PATCH', r.url, r.status)
         yield from utils._verify_successful_response(r)
 
-        data = yield from r.json()
-        log.debug(request_success_log.format(json=payload, response=r, data=data))
+        data = yield from r.json(loads=utils.from_json)
+        log.debug(request_success_log, r.url, payload, data)
 
     @asyncio.coroutine
     def edit_role(self, server, role, **fields):
@@ -2224,7 +2433,8 @@ class Client:
 
         Edits the specified :class:`Role` for the entire :class:`Server`.
 
-        This does **not** edit the role in place.
+        This does **not** edit the role in place. If none of the fields given
+        differ from the role's current state then no request is made.
 
         All fields except ``server`` and ``role`` are optional.
 
@@ -2261,7 +2471,7 @@ class Client:
             Editing the role failed.
         """
 
-        url = '{0}/{1.id}/roles/{2.id}'.format(endpoints.SERVERS, server, role)
+        url = '%s/%s/roles/%s' % (endpoints.SERVERS, server.id, role.id)
         color = fields.get('color')
         if color is None:
             color = fields.get('colour', role.colour)
@@ -2273,12 +2483,19 @@ class Client:
             'hoist': fields.get('hoist', role.hoist)
         }
 
-        r = yield from self.session.patch(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=r))
+        # nothing would change so don't bother with the request
+        if (payload['name'] == role.name and
+            payload['permissions'] == role.permissions.value and
+            payload['color'] == role.colour.value and
+            payload['hoist'] == role.hoist):
+            return
+
+        r = yield from self.session.patch(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'PATCH', r.url, r.status)
         yield from utils._verify_successful_response(r)
 
-        data = yield from r.json(encoding='utf-8')
-        log.debug(request_success_log.format(json=payload, response=r, data=data))
+        data = yield from r.json(loads=utils.from_json)
+        log.debug(request_success_log, r.url, payload, data)
 
     @asyncio.coroutine
     def delete_role(self, server, role):
@@ -2303,22 +2520,21 @@ class Client:
             Deleting the role failed.
         """
 
-        url = '{0}/{1.id}/roles/{2.id}'.format(endpoints.SERVERS, server, role)
+        url = '%s/%s/roles/%s' % (endpoints.SERVERS, server.id, role.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
     @asyncio.coroutine
     def _replace_roles(self, member, roles):
-        url = '{0}/{1.server.id}/members/{1.id}'.format(endpoints.SERVERS, member)
+        url = '%s/%s/members/%s' % (endpoints.SERVERS, member.server.id, member.id)
 
         payload = {
             'roles': roles
         }
 
-        r = yield from self.session.patch(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=r))
+        r = yield from self._retry_helper('replace_roles', 'PATCH', url, data=utils._to_json_body(payload))
         yield from utils._verify_successful_response(r)
         yield from r.release()
 
@@ -2348,7 +2564,9 @@ class Client:
             Adding roles failed.
         """
 
-        new_roles = utils._unique(role.id for role in itertools.chain(member.roles, roles))
+        ids = [role.id for role in member.roles]
+        ids.extend(role.id for role in roles)
+        new_roles = utils._unique(ids)
         yield from self._replace_roles(member, new_roles)
 
     @asyncio.coroutine
@@ -2375,18 +2593,8 @@ class Client:
         HTTPException
             Removing roles failed.
         """
-        new_roles = [x.id for x in member.roles]
-        remove = []
-        for role in roles:
-            try:
-                index = new_roles.index(role.id)
-                remove.append(index)
-            except ValueError:
-                continue
-
-        for index in reversed(remove):
-            del new_roles[index]
-
+        remove = {role.id for role in roles}
+        new_roles = [x.id for x in member.roles if x.id not in remove]
         yield from self._replace_roles(member, new_roles)
 
     @asyncio.coroutine
@@ -2422,6 +2630,48 @@ class Client:
         new_roles = utils._unique(role.id for role in roles)
         yield from self._replace_roles(member, new_roles)
 
+    @asyncio.coroutine
+    def replace_roles_bulk(self, members_roles, *, concurrency=5):
+        """|coro|
+
+        Replaces the roles of many :class:`Member` s at once.
+
+        This is equivalent to calling :meth:`replace_roles` for every
+        member given except the requests are issued concurrently,
+        with at most ``concurrency`` of them in flight at a time.
+        Rate limited requests are retried after the period Discord asks for.
+
+        You must have the proper permissions to use this function.
+
+        Parameters
+        -----------
+        members_roles
+            An iterable of ``(member, roles)`` pairs or a ``dict``
+            mapping a :class:`Member` to an iterable of :class:`Role` s.
+        concurrency : int
+            The maximum number of requests to have in flight at once.
+
+        Raises
+        -------
+        Forbidden
+            You do not have permissions to revoke roles.
+        HTTPException
+            Replacing roles failed.
+        """
+
+        if isinstance(members_roles, dict):
+            members_roles = members_roles.items()
+
+        semaphore = asyncio.Semaphore(concurrency, loop=self.loop)
+
+        @asyncio.coroutine
+        def replace(member, roles):
+            with (yield from semaphore):
+                yield from self._replace_roles(member, utils._unique(role.id for role in roles))
+
+        requests = [replace(member, roles) for member, roles in members_roles]
+        yield from asyncio.gather(*requests, loop=self.loop)
+
     @asyncio.coroutine
     def create_role(self, server, **fields):
         """|coro|
@@ -2438,12 +2688,12 @@ class Client:
             is stored in cache.
         """
 
-        url = '{0}/{1.id}/roles'.format(endpoints.SERVERS, server)
+        url = '%s/%s/roles' % (endpoints.SERVERS, server.id)
         r = yield from self.session.post(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='POST', response=r))
+        log.debug(request_logging_format, 'POST', r.url, r.status)
         yield from utils._verify_successful_response(r)
 
-        data = yield from r.json(encoding='utf-8')
+        data = yield from r.json(loads=utils.from_json)
         everyone = server.id == data.get('id')
         role = Role(everyone=everyone, **data)
 
@@ -2499,32 +2749,30 @@ class Client:
             or the target type was not :class:`Role` or :class:`Member`.
         """
 
-        url = '{0}/{1.id}/permissions/{2.id}'.format(endpoints.CHANNELS, channel, target)
-
-        allow = Permissions.none() if allow is None else allow
-        deny = Permissions.none() if deny is None else deny
+        url = '%s/%s/permissions/%s' % (endpoints.CHANNELS, channel.id, target.id)
 
-        if not (isinstance(allow, Permissions) and isinstance(deny, Permissions)):
+        if not ((allow is None or isinstance(allow, Permissions)) and
+                (deny is None or isinstance(deny, Permissions))):
             raise InvalidArgument('allow and deny parameters must be discord.Permissions')
 
-        deny =  deny.value
-        allow = allow.value
+        target_type = permission_target_types.get(type(target))
+        if target_type is None:
+            if isinstance(target, Member):
+                target_type = 'member'
+            elif isinstance(target, Role):
+                target_type = 'role'
+            else:
+                raise InvalidArgument('target parameter must be either discord.Member or discord.Role')
 
         payload = {
             'id': target.id,
-            'allow': allow,
-            'deny': deny
+            'allow': 0 if allow is None else allow.value,
+            'deny': 0 if deny is None else deny.value,
+            'type': target_type
         }
 
-        if isinstance(target, Member):
-            payload['type'] = 'member'
-        elif isinstance(target, Role):
-            payload['type'] = 'role'
-        else:
-            raise InvalidArgument('target parameter must be either discord.Member or discord.Role')
-
-        r = yield from self.session.put(url, data=utils.to_json(payload), headers=self.headers)
-        log.debug(request_logging_format.format(method='PUT', response=r))
+        r = yield from self.session.put(url, data=utils._to_json_body(payload), headers=self.headers)
+        log.debug(request_logging_format, 'PUT', r.url, r.status)
         yield from utils._verify_successful_response(r)
         yield from r.release()
 
@@ -2556,9 +2804,9 @@ class Client:
             Deleting channel specific permissions failed.
         """
 
-        url = '{0}/{1.id}/permissions/{2.id}'.format(endpoints.CHANNELS, channel, target)
+        url = '%s/%s/permissions/%s' % (endpoints.CHANNELS, channel.id, target.id)
         response = yield from self.session.delete(url, headers=self.headers)
-        log.debug(request_logging_format.format(method='DELETE', response=response))
+        log.debug(request_logging_format, 'DELETE', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -2594,16 +2842,16 @@ class Client:
             You do not have permissions to move the member.
         """
 
-        url = '{0}/{1.server.id}/members/{1.id}'.format(endpoints.SERVERS, member)
+        url = '%s/%s/members/%s' % (endpoints.SERVERS, member.server.id, member.id)
 
-        if getattr(channel, 'type', ChannelType.text) != ChannelType.voice:
+        if getattr(channel, 'type', None) is not ChannelType.voice:
             raise InvalidArgument('The channel provided must be a voice channel.')
 
-        payload = utils.to_json({
+        payload = utils._to_json_body({
             'channel_id': channel.id
         })
         response = yield from self.session.patch(url, data=payload, headers=self.headers)
-        log.debug(request_logging_format.format(method='PATCH', response=response))
+        log.debug(request_logging_format, 'PATCH', response.url, response.status)
         yield from utils._verify_successful_response(response)
         yield from response.release()
 
@@ -2641,7 +2889,7 @@ class Client:
         if isinstance(channel, Object):
             channel = self.get_channel(channel.id)
 
-        if getattr(channel, 'type', ChannelType.text) != ChannelType.voice:
+        if getattr(channel, 'type', None) is not ChannelType.voice:
             raise InvalidArgument('Channel passed must be a voice channel')
 
         server = channel.server
@@ -2649,7 +2897,7 @@ class Client:
         if self.is_voice_connected(server):
             raise ClientException('Already connected to a voice channel in this server')
 
-        log.info('attempting to join voice channel {0.name}'.format(channel))
+        log.info('attempting to join voice channel %s', channel.name)
 
         def session_id_found(data):
             user_id = data.get('user_id')
@@ -31,6 +31,15 @@ try:
 except AttributeError:
     create_task = asyncio.async
 
+def create_future(loop):
+    """Creates a future attached to the loop, letting the loop
+    provide its own implementation if it has one (Python 3.5.2+).
+    """
+    try:
+        return loop.create_future()
+    except AttributeError:
+        return asyncio.Future(loop=loop)
+
 try:
     run_coroutine_threadsafe = asyncio.run_coroutine_threadsafe
 except AttributeError:
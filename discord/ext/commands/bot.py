@@ -229,6 +229,12 @@ class Bot(GroupMixin, discord.Client):
             except asyncio.CancelledError:
                 pass
 
+    def _has_handler(self, event):
+        if type(self).dispatch is not Bot.dispatch:
+            return True
+        ev = 'on_' + event
+        return bool(self.extra_events.get(ev)) or hasattr(self, ev)
+
     def dispatch(self, event_name, *args, **kwargs):
         super().dispatch(event_name, *args, **kwargs)
         ev = 'on_' + event_name
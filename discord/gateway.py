@@ -33,9 +33,9 @@ from .enums import Status
 from .game import Game
 from .errors import GatewayNotFound, ConnectionClosed, InvalidArgument
 import logging
-import zlib, time, json
-from collections import namedtuple
-import threading
+import zlib, time
+import functools
+from collections import namedtuple, defaultdict
 import struct
 
 log = logging.getLogger(__name__)
@@ -50,28 +50,40 @@ class ReconnectWebSocket(Exception):
 
 EventListener = namedtuple('EventListener', 'predicate event result future')
 
-class KeepAliveHandler(threading.Thread):
-    def __init__(self, *args, **kwargs):
-        ws = kwargs.pop('ws', None)
-        interval = kwargs.pop('interval', None)
-        threading.Thread.__init__(self, *args, **kwargs)
+# the part of the IDENTIFY payload that never changes between connections
+identify_properties = {
+    '$os': sys.platform,
+    '$browser': 'discord.py',
+    '$device': 'discord.py',
+    '$referrer': '',
+    '$referring_domain': ''
+}
+
+# IP discovery packet fields, see DiscordVoiceWebSocket.initial_connection
+discovery_packet = struct.Struct('>I66x')
+discovery_port = struct.Struct('<H')
+
+class KeepAliveHandler:
+    def __init__(self, *, ws, interval):
         self.ws = ws
         self.interval = interval
-        self.daemon = True
-        self.msg = 'Keeping websocket alive with sequence {0[d]}'
-        self._stop_ev = threading.Event()
+        self.msg = 'Keeping websocket alive with sequence %s'
+        self._task = None
+
+    def start(self):
+        self._task = compat.create_task(self.run(), loop=self.ws.loop)
 
+    @asyncio.coroutine
     def run(self):
-        while not self._stop_ev.wait(self.interval):
+        loop = self.ws.loop
+        while True:
+            yield from asyncio.sleep(self.interval, loop=loop)
             data = self.get_payload()
-            log.debug(self.msg.format(data))
-            coro = self.ws.send_as_json(data)
-            f = compat.run_coroutine_threadsafe(coro, loop=self.ws.loop)
+            log.debug(self.msg, data['d'])
             try:
-                # block until sending is complete
-                f.result()
+                yield from self.ws.send_as_json(data)
             except Exception:
-                self.stop()
+                return
 
     def get_payload(self):
         return {
@@ -80,12 +92,13 @@ class KeepAliveHandler(threading.Thread):
         }
 
     def stop(self):
-        self._stop_ev.set()
+        if self._task is not None:
+            self._task.cancel()
 
 class VoiceKeepAliveHandler(KeepAliveHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.msg = 'Keeping voice websocket alive with timestamp {0[d]}'
+        self.msg = 'Keeping voice websocket alive with timestamp %s'
 
     def get_payload(self):
         return {
@@ -95,7 +108,7 @@ class VoiceKeepAliveHandler(KeepAliveHandler):
 
 
 @asyncio.coroutine
-def get_gateway(token, *, loop=None):
+def get_gateway(token, *, loop=None, session=None):
     """Returns the gateway URL for connecting to the WebSocket.
 
     Parameters
@@ -104,6 +117,9 @@ def get_gateway(token, *, loop=None):
         The discord authentication token.
     loop
         The event loop.
+    session : aiohttp.ClientSession
+        The session to issue the request with. If not given, a
+        temporary session is created for the request.
 
     Raises
     ------
@@ -115,13 +131,20 @@ def get_gateway(token, *, loop=None):
         'content-type': 'application/json'
     }
 
+    if session is not None:
+        return (yield from _request_gateway(session, headers))
+
     with aiohttp.ClientSession(loop=loop) as session:
-        resp = yield from session.get(endpoints.GATEWAY, headers=headers)
-        if resp.status != 200:
-            yield from resp.release()
-            raise GatewayNotFound()
-        data = yield from resp.json(encoding='utf-8')
-        return data.get('url')
+        return (yield from _request_gateway(session, headers))
+
+@asyncio.coroutine
+def _request_gateway(session, headers):
+    resp = yield from session.get(endpoints.GATEWAY, headers=headers)
+    if resp.status != 200:
+        yield from resp.release()
+        raise GatewayNotFound()
+    data = yield from resp.json(loads=utils.from_json)
+    return data.get('url')
 
 class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
     """Implements a WebSocket for Discord's gateway v4.
@@ -174,10 +197,15 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
         super().__init__(*args, max_size=None, **kwargs)
         # an empty dispatcher to prevent crashes
         self._dispatch = lambda *args: None
-        # generic event listeners
-        self._dispatch_listeners = []
+        # the client owning the dispatcher, used to skip the raw socket
+        # events when nothing is listening for them
+        self._client = None
+        # generic event listeners, keyed by event name then by future
+        self._dispatch_listeners = defaultdict(dict)
         # the keep alive
         self._keep_alive = None
+        # event name -> ConnectionState parser
+        self._parsers = {}
 
 
     @classmethod
@@ -187,16 +215,21 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
 
         This is for internal use only.
         """
-        gateway = yield from get_gateway(client.token, loop=client.loop)
+        gateway = yield from get_gateway(client.token, loop=client.loop, session=client.session)
         ws = yield from websockets.connect(gateway, loop=client.loop, klass=cls)
 
         # dynamically add attributes needed
         ws.token = client.token
         ws._connection = client.connection
         ws._dispatch = client.dispatch
+        ws._client = client
+        ws._parsers = {
+            attr[6:].upper(): getattr(client.connection, attr)
+            for attr in dir(client.connection) if attr.startswith('parse_')
+        }
         ws.gateway = gateway
 
-        log.info('Created websocket connected to {}'.format(gateway))
+        log.info('Created websocket connected to %s', gateway)
         yield from ws.identify()
         log.info('sent the identify payload to create the websocket')
         return ws
@@ -221,9 +254,10 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
             A future to wait for.
         """
 
-        future = asyncio.Future(loop=self.loop)
+        future = compat.create_future(self.loop)
         entry = EventListener(event=event, predicate=predicate, result=result, future=future)
-        self._dispatch_listeners.append(entry)
+        self._dispatch_listeners[event][future] = entry
+        future.add_done_callback(functools.partial(self._remove_listener, event))
         return future
 
     @asyncio.coroutine
@@ -233,13 +267,7 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
             'op': self.IDENTIFY,
             'd': {
                 'token': self.token,
-                'properties': {
-                    '$os': sys.platform,
-                    '$browser': 'discord.py',
-                    '$device': 'discord.py',
-                    '$referrer': '',
-                    '$referring_domain': ''
-                },
+                'properties': identify_properties,
                 'compress': True,
                 'large_threshold': 250,
                 'v': 3
@@ -249,17 +277,25 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
 
     @asyncio.coroutine
     def received_message(self, msg):
-        self._dispatch('socket_raw_receive', msg)
+        dispatch = self._dispatch
+        client = self._client
+        if client._has_handler('socket_raw_receive'):
+            dispatch('socket_raw_receive', msg)
 
         if isinstance(msg, bytes):
-            msg = zlib.decompress(msg, 15, 10490000) # This is 10 MiB
-            msg = msg.decode('utf-8')
-
-        msg = json.loads(msg)
+            # every frame is a complete zlib stream, so there is no inflate
+            # state worth keeping between them. the output buffer is left
+            # at its default size and grown as needed rather than starting
+            # every frame with a 10 MiB allocation
+            msg = zlib.decompress(msg)
+
+        # from_json takes the inflated bytes as they are
+        msg = utils.from_json(msg)
         state = self._connection
 
-        log.debug('WebSocket Event: {}'.format(msg))
-        self._dispatch('socket_response', msg)
+        log.debug('WebSocket Event: %s', msg)
+        if client._has_handler('socket_response'):
+            dispatch('socket_response', msg)
 
         op = msg.get('op')
         data = msg.get('d')
@@ -267,21 +303,22 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
         if 's' in msg:
             state.sequence = msg['s']
 
-        if op == self.RECONNECT:
-            # "reconnect" can only be handled by the Client
-            # so we terminate our connection and raise an
-            # internal exception signalling to reconnect.
-            log.info('Receivede RECONNECT opcode.')
-            yield from self.close()
-            raise ReconnectWebSocket()
-
-        if op == self.INVALIDATE_SESSION:
-            state.sequence = None
-            state.session_id = None
-            return
-
+        # nearly every frame is a DISPATCH so check for that first
         if op != self.DISPATCH:
-            log.info('Unhandled op {}'.format(op))
+            if op == self.RECONNECT:
+                # "reconnect" can only be handled by the Client
+                # so we terminate our connection and raise an
+                # internal exception signalling to reconnect.
+                log.info('Receivede RECONNECT opcode.')
+                yield from self.close()
+                raise ReconnectWebSocket()
+
+            if op == self.INVALIDATE_SESSION:
+                state.sequence = None
+                state.session_id = None
+                return
+
+            log.info('Unhandled op %s', op)
             return
 
         event = msg.get('t')
@@ -294,41 +331,44 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
 
         if is_ready or event == 'RESUMED':
             interval = data['heartbeat_interval'] / 1000.0
+            if self._keep_alive:
+                self._keep_alive.stop()
             self._keep_alive = KeepAliveHandler(ws=self, interval=interval)
             self._keep_alive.start()
 
-        parser = 'parse_' + event.lower()
-
-        try:
-            func = getattr(self._connection, parser)
-        except AttributeError:
-            log.info('Unhandled event {}'.format(event))
+        func = self._parsers.get(event)
+        if func is None:
+            log.info('Unhandled event %s', event)
         else:
             func(data)
 
-        # remove the dispatched listeners
-        removed = []
-        for index, entry in enumerate(self._dispatch_listeners):
-            if entry.event != event:
-                continue
+        # resolve the listeners waiting for this event, they remove
+        # themselves from the table once their future is done
+        listeners = self._dispatch_listeners.get(event)
+        if not listeners:
+            return
 
-            future = entry.future
-            if future.cancelled():
-                removed.append(index)
+        for future, entry in tuple(listeners.items()):
+            if future.done():
+                continue
 
             try:
                 valid = entry.predicate(data)
             except Exception as e:
                 future.set_exception(e)
-                removed.append(index)
             else:
                 if valid:
                     ret = data if entry.result is None else entry.result(data)
                     future.set_result(ret)
-                    removed.append(index)
 
-        for index in reversed(removed):
-            del self._dispatch_listeners[index]
+    def _remove_listener(self, event, future):
+        listeners = self._dispatch_listeners.get(event)
+        if listeners is None:
+            return
+
+        listeners.pop(future, None)
+        if not listeners:
+            del self._dispatch_listeners[event]
 
     def _can_handle_close(self, code):
         return code in (4006, 4008, 4009) or code in range(1001, 1015)
@@ -347,14 +387,15 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
             yield from self.received_message(msg)
         except websockets.exceptions.ConnectionClosed as e:
             if self._can_handle_close(e.code):
-                log.info('Websocket closed with {0.code}, attempting a reconnect.'.format(e))
+                log.info('Websocket closed with %s, attempting a reconnect.', e.code)
                 raise ReconnectWebSocket() from e
             else:
                 raise ConnectionClosed(e) from e
 
     @asyncio.coroutine
     def send(self, data):
-        self._dispatch('socket_raw_send', data)
+        if self._client._has_handler('socket_raw_send'):
+            self._dispatch('socket_raw_send', data)
         yield from super().send(data)
 
     @asyncio.coroutine
@@ -382,16 +423,16 @@ class DiscordWebSocket(websockets.client.WebSocketClientProtocol):
         }
 
         sent = utils.to_json(payload)
-        log.debug('Sending "{}" to change status'.format(sent))
+        log.debug('Sending "%s" to change status', sent)
         yield from self.send(sent)
 
+        status = Status.idle if idle_since else Status.online
         for server in self._connection.servers:
             me = server.me
             if me is None:
                 continue
 
             me.game = game
-            status = Status.idle if idle_since else Status.online
             me.status = status
 
     @asyncio.coroutine
@@ -491,7 +532,7 @@ class DiscordVoiceWebSocket(websockets.client.WebSocketClientProtocol):
         }
 
         yield from self.send_as_json(payload)
-        log.debug('Selected protocol as {}'.format(payload))
+        log.debug('Selected protocol as %s', payload)
 
     @asyncio.coroutine
     def speak(self, is_speaking=True):
@@ -504,11 +545,11 @@ class DiscordVoiceWebSocket(websockets.client.WebSocketClientProtocol):
         }
 
         yield from self.send_as_json(payload)
-        log.debug('Voice speaking now set to {}'.format(is_speaking))
+        log.debug('Voice speaking now set to %s', is_speaking)
 
     @asyncio.coroutine
     def received_message(self, msg):
-        log.debug('Voice websocket frame received: {}'.format(msg))
+        log.debug('Voice websocket frame received: %s', msg)
         op = msg.get('op')
         data = msg.get('d')
 
@@ -525,11 +566,10 @@ class DiscordVoiceWebSocket(websockets.client.WebSocketClientProtocol):
         state = self._connection
         state.ssrc = data.get('ssrc')
         state.voice_port = data.get('port')
-        packet = bytearray(70)
-        struct.pack_into('>I', packet, 0, state.ssrc)
+        packet = discovery_packet.pack(state.ssrc)
         state.socket.sendto(packet, (state.endpoint_ip, state.voice_port))
         recv = yield from self.loop.sock_recv(state.socket, 70)
-        log.debug('received packet in initial_connection: {}'.format(recv))
+        log.debug('received packet in initial_connection: %s', recv)
 
         # the ip is ascii starting at the 4th byte and ending at the first null
         ip_start = 4
@@ -538,9 +578,9 @@ class DiscordVoiceWebSocket(websockets.client.WebSocketClientProtocol):
 
         # the port is a little endian unsigned short in the last two bytes
         # yes, this is different endianness from everything else
-        state.port = struct.unpack_from('<H', recv, len(recv) - 2)[0]
+        state.port = discovery_port.unpack_from(recv, len(recv) - 2)[0]
 
-        log.debug('detected ip: {0.ip} port: {0.port}'.format(state))
+        log.debug('detected ip: %s port: %s', state.ip, state.port)
         yield from self.select_protocol(state.ip, state.port)
         log.info('selected the voice protocol for use')
 
@@ -554,7 +594,7 @@ class DiscordVoiceWebSocket(websockets.client.WebSocketClientProtocol):
     def poll_event(self):
         try:
             msg = yield from asyncio.wait_for(self.recv(), timeout=30.0, loop=self.loop)
-            yield from self.received_message(json.loads(msg))
+            yield from self.received_message(utils.from_json(msg))
         except websockets.exceptions.ConnectionClosed as e:
             raise ConnectionClosed(e) from e
 
@@ -29,9 +29,16 @@ import asyncio
 import aiohttp
 from .message import Message
 from .object import Object
+from . import compat
 
 PY35 = sys.version_info >= (3, 5)
 
+def _retrieve_exception(task):
+    # a prefetch that nobody ends up waiting for shouldn't be
+    # reported as an unretrieved exception
+    if not task.cancelled():
+        task.exception()
+
 class LogsFromIterator:
     @staticmethod
     def create(client, channel, limit, *, before=None, after=None, reverse=False):
@@ -76,13 +83,41 @@ class LogsFromIterator:
         self.channel = channel
         self.limit = limit
         self.messages = asyncio.Queue()
+        self._prefetch = None
+        self._has_more = False
 
     @asyncio.coroutine
     def iterate(self):
         if self.messages.empty():
             yield from self.fill_messages()
 
-        return self.messages.get_nowait()
+        msg = self.messages.get_nowait()
+        if self._has_more and self._prefetch is None and self.messages.qsize() < 50:
+            # halfway through the page, start fetching the next one so
+            # it's ready by the time this one is consumed
+            self._prefetch = compat.create_task(self.retrieve_messages(), loop=self.client.loop)
+            self._prefetch.add_done_callback(_retrieve_exception)
+
+        return msg
+
+    @asyncio.coroutine
+    def fill_messages(self):
+        if self._prefetch is not None:
+            data = yield from self._prefetch
+            self._prefetch = None
+        else:
+            data = yield from self.retrieve_messages()
+
+        # a page that isn't full means there's nothing older to fetch
+        self._has_more = len(data) == 100 and self.limit > 0
+
+        for element in data:
+            yield from self.messages.put(Message(self.channel, element))
+
+    def _cancel_prefetch(self):
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            self._prefetch = None
 
     if PY35:
         @asyncio.coroutine
@@ -97,6 +132,7 @@ class LogsFromIterator:
             except asyncio.QueueEmpty:
                 # if we're still empty at this point...
                 # we didn't get any new messages so stop looping
+                self._cancel_prefetch()
                 raise StopAsyncIteration()
 
 class LogsFromBeforeIterator(LogsFromIterator):
@@ -105,7 +141,7 @@ class LogsFromBeforeIterator(LogsFromIterator):
         self.before = before
 
     @asyncio.coroutine
-    def fill_messages(self):
+    def retrieve_messages(self):
         if self.limit > 0:
             retrieve = self.limit if self.limit <= 100 else 100
 
@@ -113,8 +149,9 @@ class LogsFromBeforeIterator(LogsFromIterator):
             if len(data):
                 self.limit -= retrieve
                 self.before = Object(id=data[-1]['id'])
-                for element in data:
-                    yield from self.messages.put(Message(channel=self.channel, **element))
+                return data
+
+        return []
 
 class LogsFromAfterIterator(LogsFromIterator):
     """Iterator for retrieving "after" style responses.
@@ -127,7 +164,7 @@ class LogsFromAfterIterator(LogsFromIterator):
         self.reverse = reverse
 
     @asyncio.coroutine
-    def fill_messages(self):
+    def retrieve_messages(self):
         if self.limit > 0:
             retrieve = self.limit if self.limit <= 100 else 100
 
@@ -135,8 +172,9 @@ class LogsFromAfterIterator(LogsFromIterator):
             if len(data):
                 self.limit -= retrieve
                 self.after = Object(id=data[0]['id'])
-                for element in (data if not self.reverse else reversed(data)):
-                    yield from self.messages.put(Message(channel=self.channel, **element))
+                return data if not self.reverse else list(reversed(data))
+
+        return []
 
 class LogsFromBeforeAfterIterator(LogsFromIterator):
     """Newest -> Oldest."""
@@ -146,7 +184,7 @@ class LogsFromBeforeAfterIterator(LogsFromIterator):
         self.after = after
 
     @asyncio.coroutine
-    def fill_messages(self):
+    def retrieve_messages(self):
         if self.limit > 0:
             retrieve = self.limit if self.limit <= 100 else 100
 
@@ -156,9 +194,12 @@ class LogsFromBeforeAfterIterator(LogsFromIterator):
                 self.before = Object(id=data[-1]['id'])
                 # Only filter if the oldest message is not after our endpoint
                 if int(data[-1]['id']) <= int(self.after.id):
-                    data = filter(lambda d: int(d['id']) > int(self.after.id), data)
-                for element in data:
-                        yield from self.messages.put(Message(channel=self.channel, **element))
+                    # every page after this one is past our endpoint
+                    self.limit = 0
+                    data = [d for d in data if int(d['id']) > int(self.after.id)]
+                return data
+
+        return []
 
 class LogsFromBeforeAfterReversedIterator(LogsFromIterator):
     """Oldest -> Newest."""
@@ -168,7 +209,7 @@ class LogsFromBeforeAfterReversedIterator(LogsFromIterator):
         self.after = after
 
     @asyncio.coroutine
-    def fill_messages(self):
+    def retrieve_messages(self):
         if self.limit > 0:
             retrieve = self.limit if self.limit <= 100 else 100
 
@@ -178,8 +219,9 @@ class LogsFromBeforeAfterReversedIterator(LogsFromIterator):
                 self.after = Object(id=data[0]['id'])
                 # Only filter if the newest is not before our endpoint
                 if int(data[0]['id']) >= int(self.before.id):
-                    data = filter(lambda d: int(d['id']) < int(self.before.id), reversed(data))
-                else:
-                    data = reversed(data)
-                for element in data:
-                    yield from self.messages.put(Message(channel=self.channel, **element))
+                    # every page after this one is past our endpoint
+                    self.limit = 0
+                    return [d for d in reversed(data) if int(d['id']) < int(self.before.id)]
+                return list(reversed(data))
+
+        return []
@@ -98,10 +98,23 @@ class Message:
                   '_clean_content', '_raw_channel_mentions', 'nonce',
                   'role_mentions', '_raw_role_mentions' ]
 
-    def __init__(self, **kwargs):
-        self._update(**kwargs)
+    _cached_slots = tuple(attr for attr in __slots__ if attr[0] == '_')
 
-    def _update(self, **data):
+    def __init__(self, channel, data):
+        # a fresh message has nothing cached yet so skip _update
+        self._from_data(channel, data)
+
+    def _update(self, channel, data):
+        # clear the cached properties
+        for attr in self._cached_slots:
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                pass
+
+        self._from_data(channel, data)
+
+    def _from_data(self, channel, data):
         # at the moment, the timestamps seem to be naive so they have no time zone and operate on UTC time.
         # we can use this to our advantage to use strptime instead of a complicated parsing routine.
         # example timestamp: 2015-08-21T12:03:45.782000+00:00
@@ -113,21 +126,12 @@ class Message:
         self.mention_everyone = data.get('mention_everyone')
         self.embeds = data.get('embeds')
         self.id = data.get('id')
-        self.channel = data.get('channel')
-        self.author = User(**data.get('author', {}))
+        self.channel = channel
         self.nonce = data.get('nonce')
         self.attachments = data.get('attachments')
-        self._handle_upgrades(data.get('channel_id'))
+        self._handle_upgrades(data.get('channel_id'), data.get('author', {}))
         self._handle_mentions(data.get('mentions', []), data.get('mention_roles', []))
 
-        # clear the cached properties
-        cached = filter(lambda attr: attr[0] == '_', self.__slots__)
-        for attr in cached:
-            try:
-                delattr(self, attr)
-            except AttributeError:
-                pass
-
     def _handle_mentions(self, mentions, role_mentions):
         self.mentions = []
         self.channel_mentions = []
@@ -231,19 +235,20 @@ class Message:
         pattern = re.compile('|'.join(transformations.keys()))
         return pattern.sub(repl2, result)
 
-    def _handle_upgrades(self, channel_id):
+    def _handle_upgrades(self, channel_id, author):
         self.server = None
-        if isinstance(self.channel, Object):
-            return
-
-        if self.channel is None:
+        channel = self.channel
+        if channel is None:
             if channel_id is not None:
                 self.channel = Object(id=channel_id)
                 self.channel.is_private = True
-            return
-
-        if not self.channel.is_private:
-            self.server = self.channel.server
-            found = self.server.get_member(self.author.id)
+        elif not isinstance(channel, Object) and not channel.is_private:
+            self.server = channel.server
+            # the author is usually a cached member so only build
+            # a new User if it isn't
+            found = self.server.get_member(author.get('id'))
             if found is not None:
                 self.author = found
+                return
+
+        self.author = User(**author)
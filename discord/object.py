@@ -43,12 +43,15 @@ class Object:
     -----------
     id : str
         The ID of the object.
+    name : Optional[str]
+        The name of the object, if one is known.
     """
 
-    def __init__(self, id):
+    def __init__(self, id, name=None):
         self.id = id
+        self.name = name
 
     @property
     def created_at(self):
         """Returns the private channel's creation time in UTC."""
-        return utils.snowflake_time(self.id)
+        return snowflake_time(self.id)
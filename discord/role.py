@@ -68,7 +68,7 @@ class Role(Hashable):
     """
 
     __slots__ = ['id', 'name', 'permissions', 'color', 'colour', 'position',
-                 'managed', 'mentionable', '_is_everyone', 'hoist' ]
+                 'managed', 'mentionable', '_is_everyone', 'hoist', '_int_id' ]
 
     def __init__(self, **kwargs):
         self._is_everyone = kwargs.get('everyone', False)
@@ -79,6 +79,8 @@ class Role(Hashable):
 
     def _update(self, **kwargs):
         self.id = kwargs.get('id')
+        # members' roles are sorted by ID so keep the numeric form around
+        self._int_id = int(self.id)
         self.name = kwargs.get('name')
         self.permissions = Permissions(kwargs.get('permissions', 0))
         self.position = kwargs.get('position', 0)
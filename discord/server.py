@@ -58,7 +58,8 @@ class Server(Hashable):
         Similar to :attr:`Client.user` except an instance of :class:`Member`.
         This is essentially used to get the member version of yourself.
     roles
-        A list of :class:`Role` that the server has available.
+        A list of :class:`Role` that the server has available. This list is
+        kept up to date by the library and should be treated as read-only.
     region : :class:`ServerRegion`
         The region the server belongs on. There is a chance that the region
         will be a ``str`` if the value is not recognised by the enumerator.
@@ -87,9 +88,10 @@ class Server(Hashable):
     __slots__ = ['afk_timeout', 'afk_channel', '_members', '_channels', 'icon',
                  'name', 'id', 'owner', 'unavailable', 'name', 'region',
                  '_default_role', '_default_channel', 'roles', '_member_count',
-                 'large', 'owner_id' ]
+                 'large', 'owner_id', '_state', '_roles_by_id' ]
 
     def __init__(self, **kwargs):
+        self._state = kwargs.pop('state', None)
         self._channels = {}
         self.owner = None
         self._members = {}
@@ -117,12 +119,42 @@ class Server(Hashable):
         """Returns a :class:`Member` with the given ID. If not found, returns None."""
         return self._members.get(user_id)
 
+    @property
+    def me(self):
+        state = self._state
+        if state is None or state.user is None:
+            return None
+        return self._members.get(state.user.id)
+
+    @property
+    def voice_client(self):
+        """Returns the :class:`VoiceClient` associated with this server, if any."""
+        state = self._state
+        if state is None:
+            return None
+        return state._get_voice_client(self.id)
+
     def _add_member(self, member):
         self._members[member.id] = member
 
     def _remove_member(self, member):
         self._members.pop(member.id, None)
 
+    def _get_role(self, role_id):
+        roles_by_id = self._roles_by_id
+        if len(roles_by_id) != len(self.roles):
+            # roles was modified directly so the index can't be trusted
+            roles_by_id = self._roles_by_id = {role.id: role for role in self.roles}
+        return roles_by_id.get(role_id)
+
+    def _add_role(self, role):
+        self.roles.append(role)
+        self._roles_by_id[role.id] = role
+
+    def _remove_role(self, role):
+        self.roles.remove(role)
+        self._roles_by_id.pop(role.id, None)
+
     def __str__(self):
         return self.name
 
@@ -157,10 +189,11 @@ class Server(Hashable):
         self.id = guild['id']
         self.roles = [Role(everyone=(self.id == r['id']), **r) for r in guild.get('roles', [])]
 
+        self._roles_by_id = roles_by_id = {role.id: role for role in self.roles}
         for data in guild.get('members', []):
             roles = [self.default_role]
             for role_id in data['roles']:
-                role = utils.find(lambda r: r.id == role_id, self.roles)
+                role = roles_by_id.get(role_id)
                 if role is not None:
                     roles.append(role)
 
@@ -36,7 +36,8 @@ from .enums import Status
 
 
 from collections import deque, namedtuple
-import copy, enum, math
+import enum
+from operator import attrgetter
 import datetime
 import asyncio
 import logging
@@ -47,14 +48,26 @@ class ListenerType(enum.Enum):
 Listener = namedtuple('Listener', ('type', 'future', 'predicate'))
 log = logging.getLogger(__name__)
 ReadyState = namedtuple('ReadyState', ('launch', 'servers'))
+status_by_value = { status.value: status for status in Status }
+role_id_key = attrgetter('_int_id')
+utcfromtimestamp = datetime.datetime.utcfromtimestamp
 
 class ConnectionState:
+    __slots__ = [ 'loop', 'max_messages', 'dispatch', 'chunker', '_listeners', 'user',
+                  'sequence', 'session_id', '_servers', '_channels', '_voice_clients',
+                  '_private_channels', '_private_channels_by_user', '_messages',
+                  '_messages_by_id', '_messages_by_server', '_ready_state',
+                  '_ready_timer', '_ready_task' ]
+
     def __init__(self, dispatch, chunker, max_messages, *, loop):
         self.loop = loop
         self.max_messages = max_messages
         self.dispatch = dispatch
         self.chunker = chunker
-        self._listeners = []
+        # listeners partitioned by their ListenerType
+        self._listeners = { listener_type: [] for listener_type in ListenerType }
+        self._ready_timer = None
+        self._ready_task = None
         self.clear()
 
     def clear(self):
@@ -62,6 +75,8 @@ class ConnectionState:
         self.sequence = None
         self.session_id = None
         self._servers = {}
+        # every server channel by ID, so lookups don't walk each server
+        self._channels = {}
         self._voice_clients = {}
         self._private_channels = {}
         # extra dict to look up private channels by user id
@@ -69,30 +84,31 @@ class ConnectionState:
         self.messages = deque(maxlen=self.max_messages)
 
     def process_listeners(self, listener_type, argument, result):
-        removed = []
-        for i, listener in enumerate(self._listeners):
-            if listener.type != listener_type:
-                continue
+        listeners = self._listeners[listener_type]
+        if not listeners:
+            return
 
+        survivors = []
+        for index, listener in enumerate(listeners):
             future = listener.future
             if future.cancelled():
-                removed.append(i)
                 continue
 
             try:
                 passed = listener.predicate(argument)
             except Exception as e:
                 future.set_exception(e)
-                removed.append(i)
             else:
                 if passed:
                     future.set_result(result)
-                    removed.append(i)
-                    if listener.type == ListenerType.chunk:
+                    if listener_type == ListenerType.chunk:
+                        # a chunk only answers a single listener
+                        survivors.extend(listeners[index + 1:])
                         break
+                else:
+                    survivors.append(listener)
 
-        for index in reversed(removed):
-            del self._listeners[index]
+        self._listeners[listener_type] = survivors
 
     @property
     def voice_clients(self):
@@ -115,10 +131,23 @@ class ConnectionState:
         return self._servers.get(server_id)
 
     def _add_server(self, server):
+        old = self._servers.get(server.id)
+        if old is not None and old is not server:
+            self._unindex_channels(old)
         self._servers[server.id] = server
+        self._index_channels(server)
 
     def _remove_server(self, server):
         self._servers.pop(server.id, None)
+        self._unindex_channels(server)
+
+    def _index_channels(self, server):
+        for channel in server.channels:
+            self._channels[channel.id] = channel
+
+    def _unindex_channels(self, server):
+        for channel in server.channels:
+            self._channels.pop(channel.id, None)
 
     @property
     def private_channels(self):
@@ -138,28 +167,62 @@ class ConnectionState:
         self._private_channels.pop(channel.id, None)
         self._private_channels_by_user.pop(channel.user.id, None)
 
+    @property
+    def messages(self):
+        return self._messages
+
+    @messages.setter
+    def messages(self, value):
+        self._messages = value
+        # side tables to look up cached messages by ID and
+        # to find the IDs of a server's cached messages
+        self._messages_by_id = {}
+        self._messages_by_server = {}
+        for message in value:
+            self._index_message(message)
+
     def _get_message(self, msg_id):
-        return utils.find(lambda m: m.id == msg_id, self.messages)
+        return self._messages_by_id.get(msg_id)
+
+    def _index_message(self, message):
+        self._messages_by_id[message.id] = message
+        server = message.server
+        if server is not None:
+            self._messages_by_server.setdefault(server.id, set()).add(message.id)
+
+    def _unindex_message(self, message):
+        self._messages_by_id.pop(message.id, None)
+        server = message.server
+        if server is not None:
+            ids = self._messages_by_server.get(server.id)
+            if ids is not None:
+                ids.discard(message.id)
+                if not ids:
+                    del self._messages_by_server[server.id]
+
+    def _add_message(self, message):
+        messages = self._messages
+        if messages.maxlen is not None and len(messages) == messages.maxlen:
+            # the deque is about to evict its oldest message
+            self._unindex_message(messages[0])
+        messages.append(message)
+        self._index_message(message)
 
     def _add_server_from_data(self, guild):
-        server = Server(**guild)
-        Server.me = property(lambda s: s.get_member(self.user.id))
-        Server.voice_client = property(lambda s: self._get_voice_client(s.id))
+        server = Server(state=self, **guild)
         self._add_server(server)
         return server
 
     def chunks_needed(self, server):
-        for chunk in range(math.ceil(server._member_count / 1000)):
-            yield self.receive_chunk(server.id)
+        # ceiling division, each chunk carries at most 1000 members
+        count = -(-server._member_count // 1000)
+        return [self.receive_chunk(server.id) for _ in range(count)]
 
     @asyncio.coroutine
     def _delay_ready(self):
-        launch = self._ready_state.launch
-        while not launch.is_set():
-            # this snippet of code is basically waiting 2 seconds
-            # until the last GUILD_CREATE was sent
-            launch.set()
-            yield from asyncio.sleep(2)
+        # launch is set 2 seconds after the last GUILD_CREATE was sent
+        yield from self._ready_state.launch.wait()
+        self._ready_timer = None
 
         # get all the chunks
         servers = self._ready_state.servers
@@ -178,11 +241,16 @@ class ConnectionState:
 
         # remove the state
         del self._ready_state
+        self._ready_task = None
 
         # dispatch the event
         self.dispatch('ready')
 
     def parse_ready(self, data):
+        if self._ready_task is not None:
+            # a new READY supersedes one that is still being processed
+            self._ready_task.cancel()
+
         self._ready_state = ReadyState(launch=asyncio.Event(), servers=[])
         self.user = User(**data['user'])
         guilds = data.get('guilds')
@@ -197,30 +265,37 @@ class ConnectionState:
             self._add_private_channel(PrivateChannel(id=pm['id'],
                                      user=User(**pm['recipient'])))
 
-        compat.create_task(self._delay_ready(), loop=self.loop)
+        self._reset_ready_timer()
+        self._ready_task = self.loop.create_task(self._delay_ready())
+
+    def _reset_ready_timer(self):
+        if self._ready_timer is not None:
+            self._ready_timer.cancel()
+        self._ready_timer = self.loop.call_later(2, self._ready_state.launch.set)
 
     def parse_message_create(self, data):
-        channel = self.get_channel(data.get('channel_id'))
-        message = Message(channel=channel, **data)
+        channel = self.get_channel(data['channel_id'])
+        message = Message(channel, data)
         self.dispatch('message', message)
-        self.messages.append(message)
+        self._add_message(message)
 
     def parse_message_delete(self, data):
-        message_id = data.get('id')
+        message_id = data['id']
         found = self._get_message(message_id)
         if found is not None:
             self.dispatch('message_delete', found)
-            self.messages.remove(found)
+            self._unindex_message(found)
+            self._messages.remove(found)
 
     def parse_message_update(self, data):
-        message = self._get_message(data.get('id'))
+        message = self._get_message(data['id'])
         if message is not None:
-            older_message = copy.copy(message)
+            older_message = utils._shallow_copy(message)
             if 'content' not in data:
                 # embed only edit
                 message.embeds = data['embeds']
             else:
-                message._update(channel=message.channel, **data)
+                message._update(message.channel, data)
 
             self.dispatch('message_edit', older_message, message)
 
@@ -229,7 +304,7 @@ class ConnectionState:
         if server is None:
             return
 
-        status = data.get('status')
+        status = data['status']
         user = data['user']
         member_id = user['id']
         member = server.get_member(member_id)
@@ -242,14 +317,11 @@ class ConnectionState:
             member = self._make_member(server, data)
             server._add_member(member)
 
-        old_member = copy.copy(member)
-        member.status = data.get('status')
-        try:
-            member.status = Status(member.status)
-        except:
-            pass
+        old_member = utils._shallow_copy(member)
+        # unknown statuses are kept as the raw string
+        member.status = status_by_value.get(status, status)
 
-        game = data.get('game', {})
+        game = data.get('game')
         member.game = Game(**game) if game else None
         member.name = user.get('username', member.name)
         member.avatar = user.get('avatar', member.avatar)
@@ -262,19 +334,20 @@ class ConnectionState:
     def parse_channel_delete(self, data):
         server =  self._get_server(data.get('guild_id'))
         if server is not None:
-            channel_id = data.get('id')
+            channel_id = data['id']
             channel = server.get_channel(channel_id)
             if channel is not None:
                 server._remove_channel(channel)
+                self._channels.pop(channel.id, None)
                 self.dispatch('channel_delete', channel)
 
     def parse_channel_update(self, data):
         server = self._get_server(data.get('guild_id'))
         if server is not None:
-            channel_id = data.get('id')
+            channel_id = data['id']
             channel = server.get_channel(channel_id)
             if channel is not None:
-                old_channel = copy.copy(channel)
+                old_channel = utils._shallow_copy(channel)
                 channel._update(server=server, **data)
                 self.dispatch('channel_update', old_channel, channel)
 
@@ -291,28 +364,33 @@ class ConnectionState:
             if server is not None:
                 channel = Channel(server=server, **data)
                 server._add_channel(channel)
+                self._channels[channel.id] = channel
 
         self.dispatch('channel_create', channel)
 
     def _make_member(self, server, data):
         roles = [server.default_role]
-        for roleid in data.get('roles', []):
-            role = utils.get(server.roles, id=roleid)
-            if role is not None:
-                roles.append(role)
-
-        data['roles'] = sorted(roles, key=lambda r: int(r.id))
+        role_ids = data.get('roles')
+        if role_ids:
+            get_role = server._get_role
+            for roleid in role_ids:
+                role = get_role(roleid)
+                if role is not None:
+                    roles.append(role)
+
+        roles.sort(key=role_id_key)
+        data['roles'] = roles
         return Member(server=server, **data)
 
     def parse_guild_member_add(self, data):
-        server = self._get_server(data.get('guild_id'))
+        server = self._get_server(data['guild_id'])
         member = self._make_member(server, data)
         server._add_member(member)
         server._member_count += 1
         self.dispatch('member_join', member)
 
     def parse_guild_member_remove(self, data):
-        server = self._get_server(data.get('guild_id'))
+        server = self._get_server(data['guild_id'])
         if server is not None:
             user_id = data['user']['id']
             member = server.get_member(user_id)
@@ -331,12 +409,12 @@ class ConnectionState:
                 self.dispatch('member_remove', member)
 
     def parse_guild_member_update(self, data):
-        server = self._get_server(data.get('guild_id'))
+        server = self._get_server(data['guild_id'])
         user_id = data['user']['id']
         member = server.get_member(user_id)
         if member is not None:
             user = data['user']
-            old_member = copy.copy(member)
+            old_member = utils._shallow_copy(member)
             member.name = user['username']
             member.discriminator = user['discriminator']
             member.avatar = user['avatar']
@@ -348,24 +426,25 @@ class ConnectionState:
                 member.nick = data['nick']
 
             # update the roles
-            member.roles = [server.default_role]
-            for role in server.roles:
-                if role.id in data['roles']:
-                    member.roles.append(role)
+            roles = [server.default_role]
+            role_ids = utils._unique(data['roles'])
+            roles.extend(role for role in map(server._get_role, role_ids) if role is not None)
+            member.roles = roles
 
             # sort the roles by ID since they can be "randomised"
-            member.roles.sort(key=lambda r: int(r.id))
+            roles.sort(key=role_id_key)
             self.dispatch('member_update', old_member, member)
 
     def _get_create_server(self, data):
-        if data.get('unavailable') == False:
+        if data.get('unavailable') is False:
             # GUILD_CREATE with unavailable in the response
             # usually means that the server has become available
             # and is therefore in the cache
-            server = self._get_server(data.get('id'))
+            server = self._get_server(data['id'])
             if server is not None:
                 server.unavailable = False
                 server._from_data(data)
+                self._index_channels(server)
                 return server
 
         return self._add_server_from_data(data)
@@ -377,14 +456,14 @@ class ConnectionState:
         if chunks:
             yield from asyncio.wait(chunks)
 
-        if unavailable == False:
+        if unavailable is False:
             self.dispatch('server_available', server)
         else:
             self.dispatch('server_join', server)
 
     def parse_guild_create(self, data):
         unavailable = data.get('unavailable')
-        if unavailable == True:
+        if unavailable is True:
             # joined a server with unavailable == True so..
             return
 
@@ -392,7 +471,7 @@ class ConnectionState:
 
         # check if it requires chunking
         if server.large:
-            if unavailable == False:
+            if unavailable is False:
                 # check if we're waiting for 'useful' READY
                 # and if we are, we don't want to dispatch any
                 # event such as server_join or server_available
@@ -400,7 +479,7 @@ class ConnectionState:
                 # so we say.
                 try:
                     state = self._ready_state
-                    state.launch.clear()
+                    self._reset_ready_timer()
                     state.servers.append(server)
                 except AttributeError:
                     # the _ready_state attribute is only there during
@@ -411,24 +490,25 @@ class ConnectionState:
 
             # since we're not waiting for 'useful' READY we'll just
             # do the chunk request here
-            compat.create_task(self._chunk_and_dispatch(server, unavailable), loop=self.loop)
+            self.loop.create_task(self._chunk_and_dispatch(server, unavailable))
             return
 
         # Dispatch available if newly available
-        if unavailable == False:
+        if unavailable is False:
             self.dispatch('server_available', server)
         else:
             self.dispatch('server_join', server)
 
     def parse_guild_update(self, data):
-        server = self._get_server(data.get('id'))
+        server = self._get_server(data['id'])
         if server is not None:
-            old_server = copy.copy(server)
+            old_server = utils._shallow_copy(server)
             server._from_data(data)
+            self._index_channels(server)
             self.dispatch('server_update', old_server, server)
 
     def parse_guild_delete(self, data):
-        server = self._get_server(data.get('id'))
+        server = self._get_server(data['id'])
         if server is None:
             return
 
@@ -439,8 +519,17 @@ class ConnectionState:
             self.dispatch('server_unavailable', server)
             return
 
-        # do a cleanup of the messages cache
-        self.messages = deque((msg for msg in self.messages if msg.server != server), maxlen=self.max_messages)
+        # do a cleanup of the messages cache. the server's messages are
+        # dropped from the indexes directly, the deque has no way to remove
+        # arbitrary entries so it is only rebuilt if it held any of them
+        removed = self._messages_by_server.pop(server.id, None)
+        if removed:
+            by_id = self._messages_by_id
+            for message_id in removed:
+                by_id.pop(message_id, None)
+
+            kept = [msg for msg in self._messages if msg.id not in removed]
+            self._messages = deque(kept, maxlen=self.max_messages)
 
         self._remove_server(server)
         self.dispatch('server_remove', server)
@@ -452,69 +541,64 @@ class ConnectionState:
         # hence we don't remove it from cache or do anything
         # strange with it, the main purpose of this event
         # is mainly to dispatch to another event worth listening to for logging
-        server = self._get_server(data.get('guild_id'))
+        server = self._get_server(data['guild_id'])
         if server is not None:
-            user_id = data.get('user', {}).get('id')
-            member = utils.get(server.members, id=user_id)
+            user_id = data['user']['id']
+            member = server.get_member(user_id)
             if member is not None:
                 self.dispatch('member_ban', member)
 
     def parse_guild_ban_remove(self, data):
-        server = self._get_server(data.get('guild_id'))
+        server = self._get_server(data['guild_id'])
         if server is not None:
             if 'user' in data:
                 user = User(**data['user'])
                 self.dispatch('member_unban', server, user)
 
     def parse_guild_role_create(self, data):
-        server = self._get_server(data.get('guild_id'))
-        role_data = data.get('role', {})
-        everyone = server.id == role_data.get('id')
+        server = self._get_server(data['guild_id'])
+        role_data = data['role']
+        everyone = server.id == role_data['id']
         role = Role(everyone=everyone, **role_data)
-        server.roles.append(role)
+        server._add_role(role)
         self.dispatch('server_role_create', server, role)
 
     def parse_guild_role_delete(self, data):
-        server = self._get_server(data.get('guild_id'))
+        server = self._get_server(data['guild_id'])
         if server is not None:
-            role_id = data.get('role_id')
-            role = utils.find(lambda r: r.id == role_id, server.roles)
-            try:
-                server.roles.remove(role)
-            except ValueError:
-                return
-            else:
+            role = server._get_role(data['role_id'])
+            if role is not None:
+                server._remove_role(role)
                 self.dispatch('server_role_delete', server, role)
 
     def parse_guild_role_update(self, data):
-        server = self._get_server(data.get('guild_id'))
+        server = self._get_server(data['guild_id'])
         if server is not None:
-            role_id = data['role']['id']
-            role = utils.find(lambda r: r.id == role_id, server.roles)
+            role = server._get_role(data['role']['id'])
             if role is not None:
-                old_role = copy.copy(role)
+                old_role = utils._shallow_copy(role)
                 role._update(**data['role'])
                 self.dispatch('server_role_update', old_role, role)
 
     def parse_guild_members_chunk(self, data):
-        server = self._get_server(data.get('guild_id'))
-        members = data.get('members', [])
+        server = self._get_server(data['guild_id'])
+        members = data['members']
+        get_member = server.get_member
         for member in members:
-            m = self._make_member(server, member)
-            existing = server.get_member(m.id)
+            existing = get_member(member['user']['id'])
             if existing is None or existing.joined_at is None:
-                server._add_member(m)
+                server._add_member(self._make_member(server, member))
 
         # if the owner is offline, server.owner is potentially None
         # therefore we should check if this chunk makes it point to a valid
         # member.
         server.owner = server.get_member(server.owner_id)
-        log.info('processed a chunk for {} members.'.format(len(members)))
+        log.info('processed a chunk for %s members.', len(members))
         self.process_listeners(ListenerType.chunk, server, len(members))
 
     def parse_voice_state_update(self, data):
         server = self._get_server(data.get('guild_id'))
-        user_id = data.get('user_id')
+        user_id = data['user_id']
         if server is not None:
             if user_id == self.user.id:
                 voice = self._get_voice_client(server.id)
@@ -526,38 +610,29 @@ class ConnectionState:
                 self.dispatch('voice_state_update', before, after)
 
     def parse_typing_start(self, data):
-        channel = self.get_channel(data.get('channel_id'))
+        channel = self.get_channel(data['channel_id'])
         if channel is not None:
-            member = None
-            user_id = data.get('user_id')
-            is_private = getattr(channel, 'is_private', None)
-            if is_private == None:
-                return
-
-            if is_private:
+            if isinstance(channel, PrivateChannel):
                 member = channel.user
             else:
-                member = channel.server.get_member(user_id)
+                member = channel.server.get_member(data['user_id'])
 
             if member is not None:
-                timestamp = datetime.datetime.utcfromtimestamp(data.get('timestamp'))
+                timestamp = utcfromtimestamp(data['timestamp'])
                 self.dispatch('typing', channel, member, timestamp)
 
     def get_channel(self, id):
         if id is None:
             return None
 
-        for server in self.servers:
-            channel = server.get_channel(id)
-            if channel is not None:
-                return channel
+        channel = self._channels.get(id)
+        if channel is not None:
+            return channel
 
-        pm = self._get_private_channel(id)
-        if pm is not None:
-            return pm
+        return self._get_private_channel(id)
 
     def receive_chunk(self, guild_id):
-        future = asyncio.Future(loop=self.loop)
+        future = compat.create_future(self.loop)
         listener = Listener(ListenerType.chunk, future, lambda s: s.id == guild_id)
-        self._listeners.append(listener)
+        self._listeners[ListenerType.chunk].append(listener)
         return future
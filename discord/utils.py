@@ -29,7 +29,14 @@ from .errors import HTTPException, Forbidden, NotFound, InvalidArgument
 import datetime
 from base64 import b64encode
 import asyncio
+import copyreg
 import json
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DISCORD_EPOCH = 1420070400000
 
@@ -210,10 +217,32 @@ def get(iterable, **attrs):
     return find(predicate, iterable)
 
 
-def _unique(iterable):
-    seen = set()
-    adder = seen.add
-    return [x for x in iterable if not (x in seen or adder(x))]
+if sys.version_info >= (3, 7):
+    def _unique(iterable):
+        # dicts are guaranteed to keep insertion order from 3.7 onwards
+        return list(dict.fromkeys(iterable))
+else:
+    def _unique(iterable):
+        seen = set()
+        adder = seen.add
+        return [x for x in iterable if not (x in seen or adder(x))]
+
+def _shallow_copy(obj):
+    # equivalent to copy.copy for the library's __slots__ classes but
+    # without going through the generic __reduce_ex__ machinery
+    cls = obj.__class__
+    try:
+        names = cls.__dict__['__slotnames__']
+    except KeyError:
+        names = copyreg._slotnames(cls)
+
+    new = cls.__new__(cls)
+    for name in names:
+        try:
+            setattr(new, name, getattr(obj, name))
+        except AttributeError:
+            pass
+    return new
 
 def _null_event(*args, **kwargs):
     pass
@@ -226,7 +255,7 @@ def _verify_successful_response(response):
         message = None
         text = None
         if response.headers['content-type'] == 'application/json':
-            data = yield from response.json(encoding='utf-8')
+            data = yield from response.json(loads=from_json)
             message = data.get('message')
         else:
             text = yield from response.text(encoding='utf-8')
@@ -246,11 +275,29 @@ def _get_mime_type_for_image(data):
         raise InvalidArgument('Unsupported image type given')
 
 def _bytes_to_base64_data(data):
-    fmt = 'data:{mime};base64,{data}'
     mime = _get_mime_type_for_image(data)
-    b64 = b64encode(data).decode('ascii')
-    return fmt.format(mime=mime, data=b64)
-
-def to_json(obj):
-    return json.dumps(obj, separators=(',', ':'), ensure_ascii=True)
+    return 'data:' + mime + ';base64,' + b64encode(data).decode('ascii')
+
+if orjson is not None:
+    def to_json(obj):
+        return orjson.dumps(obj).decode('utf-8')
+
+    # request bodies can be handed to aiohttp as bytes without a decode round trip
+    _to_json_body = orjson.dumps
+
+    # unlike json.loads, orjson turns integers wider than 64 bits into
+    # floats. discord's own values (snowflakes are strings) fit, but
+    # user controlled ones such as a message nonce may lose precision
+    from_json = orjson.loads
+else:
+    def to_json(obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=True)
+
+    _to_json_body = to_json
+
+    def from_json(data):
+        # json.loads only accepts bytes from Python 3.6 onwards
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
 
@@ -55,6 +55,9 @@ import nacl.secret
 
 log = logging.getLogger(__name__)
 
+# version/flags, payload type, sequence, timestamp, ssrc
+rtp_header = struct.Struct('>BBHII')
+
 from . import utils, opus
 from .gateway import *
 from .errors import ClientException, InvalidArgument
@@ -191,7 +194,7 @@ class VoiceClient:
         self.sequence = 0
         self.timestamp = 0
         self.encoder = opus.Encoder(48000, 2)
-        log.info('created opus encoder with {0.__dict__}'.format(self.encoder))
+        log.info('created opus encoder with %s', self.encoder.__dict__)
 
     @property
     def server(self):
@@ -214,7 +217,7 @@ class VoiceClient:
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.setblocking(False)
 
-        log.info('Voice endpoint found {0.endpoint} (IP: {0.endpoint_ip})'.format(self))
+        log.info('Voice endpoint found %s (IP: %s)', self.endpoint, self.endpoint_ip)
 
         self.ws = yield from DiscordVoiceWebSocket.from_client(self)
         while not self._connected.is_set():
@@ -275,22 +278,16 @@ class VoiceClient:
     # audio related
 
     def _get_voice_packet(self, data):
-        header = bytearray(12)
-        nonce = bytearray(24)
         box = nacl.secret.SecretBox(bytes(self.secret_key))
 
         # Formulate header
-        header[0] = 0x80
-        header[1] = 0x78
-        struct.pack_into('>H', header, 2, self.sequence)
-        struct.pack_into('>I', header, 4, self.timestamp)
-        struct.pack_into('>I', header, 8, self.ssrc)
+        header = rtp_header.pack(0x80, 0x78, self.sequence, self.timestamp, self.ssrc)
 
-        # Copy header to nonce's first 12 bytes
-        nonce[:12] = header
+        # The nonce is the header padded out to 24 bytes
+        nonce = header + bytes(12)
 
         # Encrypt and return the data
-        return header + box.encrypt(bytes(data), bytes(nonce)).ciphertext
+        return header + box.encrypt(bytes(data), nonce).ciphertext
 
     def create_ffmpeg_player(self, filename, *, use_avconv=False, pipe=False, options=None, before_options=None, headers=None, after=None):
         """Creates a stream player for ffmpeg that launches in a separate thread to play
@@ -476,7 +473,7 @@ class VoiceClient:
         if "entries" in info:
             info = info['entries'][0]
 
-        log.info('playing URL {}'.format(url))
+        log.info('playing URL %s', url)
         download_url = info['url']
         player = self.create_ffmpeg_player(download_url, **kwargs)
 
@@ -537,7 +534,7 @@ class VoiceClient:
             raise InvalidArgument('Channels must be either 1 or 2.')
 
         self.encoder = opus.Encoder(sample_rate, channels)
-        log.info('created opus encoder with {0.__dict__}'.format(self.encoder))
+        log.info('created opus encoder with %s', self.encoder.__dict__)
 
     def create_stream_player(self, stream, *, after=None):
         """Creates a stream player that launches in a separate thread to
@@ -620,6 +617,6 @@ class VoiceClient:
         try:
             sent = self.socket.sendto(packet, (self.endpoint_ip, self.voice_port))
         except BlockingIOError:
-            log.warning('A packet has been dropped (seq: {0.sequence}, timestamp: {0.timestamp})'.format(self))
+            log.warning('A packet has been dropped (seq: %s, timestamp: %s)', self.sequence, self.timestamp)
 
         self.checked_add('timestamp', self.encoder.samples_per_frame, 4294967295)